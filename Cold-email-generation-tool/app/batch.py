@@ -0,0 +1,141 @@
+"""Headless batch mode: generate cold emails for many job URLs without the Streamlit UI.
+
+Usage (from the Cold-email-generation-tool directory):
+    python app/batch.py urls.txt -o results.jsonl
+    cat urls.txt | python app/batch.py - -o results.jsonl --concurrency 8
+
+Each processed URL is appended to the output as one JSON line. Re-running with the
+same output file resumes the batch: URLs whose record has status "ok" are skipped.
+URLs that failed ("error") or got only some of their emails ("partial") are retried.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from chains import Chain
+from page_cache import load_page
+from portfolio import get_portfolio
+from utils import clean_text
+from tracing import span, start_trace
+
+
+def read_urls(source):
+    """Read URLs one per line, skipping blanks, comments and repeats"""
+    stream = sys.stdin if source == "-" else open(source, "r")
+    try:
+        urls = [line.strip() for line in stream]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return list(dict.fromkeys(url for url in urls if url and not url.startswith("#")))
+
+
+def load_checkpoint(output_path):
+    """Return the URLs the output file already records as finished"""
+    finished = set()
+    try:
+        with open(output_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line behind
+                    continue
+                if record.get("status") == "ok":
+                    finished.add(record["url"])
+    except FileNotFoundError:
+        pass
+    return finished
+
+
+def process_url(url, chain, portfolio):
+    """Run fetch, extract, match and write for one URL and return its output record"""
+    with start_trace("batch_url", url=url):
+        return _process_url(url, chain, portfolio)
+
+
+def _process_url(url, chain, portfolio):
+    started = time.time()
+    data = load_page(url, clean_text, raise_for_status=True)
+    with span("extract_jobs", input_chars=len(data)) as attrs:
+        jobs = chain.extract_jobs(data, url=url)
+        attrs["jobs"] = len(jobs)
+
+    job_links = [[] for _ in jobs]
+    if portfolio is not None:
+        try:
+            job_links = portfolio.query_links_batch([job.get('skills', []) for job in jobs])
+        except Exception:
+            job_links = [[] for _ in jobs]
+
+    results = [{"job": job, "links": links, "email": None, "error": None}
+               for job, links in zip(jobs, job_links)]
+    for idx, email, error in chain.write_mails({idx: (job, job_links[idx]) for idx, job in enumerate(jobs)}):
+        results[idx]["email"] = email
+        results[idx]["error"] = str(error) if error is not None else None
+
+    # Only a URL with every email written is finished; the rest are retried on resume
+    errors = sum(1 for result in results if result["error"] is not None)
+    status = "ok" if not errors else "error" if errors == len(results) else "partial"
+    return {"url": url, "status": status, "jobs": results,
+            "elapsed": round(time.time() - started, 3), "finished_at": time.time()}
+
+
+def run_batch(urls, output_path, chain, portfolio, concurrency=4):
+    finished = load_checkpoint(output_path)
+    todo = [url for url in urls if url not in finished]
+    print(f"{len(urls)} URLs, {len(urls) - len(todo)} already done, {len(todo)} to process", file=sys.stderr)
+
+    done = failed = 0
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(process_url, url, chain, portfolio): url for url in todo}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                record = future.result()
+                if record["status"] == "ok":
+                    done += 1
+                else:
+                    failed += 1
+            except Exception as e:
+                record = {"url": url, "status": "error", "error": str(e), "finished_at": time.time()}
+                failed += 1
+            # Flush every record so a crash loses at most the URLs still in flight
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            print(f"[{done + failed}/{len(todo)}] {record['status']}: {url}", file=sys.stderr)
+    return done, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate cold emails for a batch of job URLs.")
+    parser.add_argument("urls", help="file with one URL per line, or - for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL results file, also used to resume")
+    parser.add_argument("--concurrency", type=int, default=4, help="URLs processed at the same time")
+    parser.add_argument("--config", help="sender configuration JSON (defaults to user_config.json)")
+    parser.add_argument("--portfolio", default="app/resource/my_portfolio.csv", help="portfolio CSV")
+    args = parser.parse_args()
+
+    user_config = None
+    if args.config:
+        with open(args.config, "r") as f:
+            user_config = json.load(f)
+    chain = Chain(user_config)
+
+    portfolio = None
+    try:
+        portfolio = get_portfolio(args.portfolio)
+        portfolio.load_portfolio()
+    except Exception as e:
+        print(f"Portfolio unavailable, generating emails without links: {e}", file=sys.stderr)
+        portfolio = None
+
+    done, failed = run_batch(read_urls(args.urls), args.output, chain, portfolio, args.concurrency)
+    print(f"Finished: {done} succeeded, {failed} failed", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
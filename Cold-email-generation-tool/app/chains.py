@@ -1,25 +1,60 @@
 import os
-from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
+from langchain_core.utils.json import parse_json_markdown
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import queue
+import hashlib
+from llm_cache import LLMCache, get_llm_cache
+from utils import estimate_tokens, split_into_chunks
+from scheduler import get_scheduler
+from prompt_builder import PromptBuilder
+from tracing import span, submit
+from dedup import get_dedup_index
+from llm_clients import get_llm_clients
+from model_router import get_model_router
+import threading
 
 load_dotenv()
 
 
 class Chain:
     def __init__(self, user_config=None):
-        self.llm = ChatGroq(
-            temperature=0,
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama-3.3-70b-versatile"
-        )
+        # Each stage calls the models routed to it, falling back when one is slow or failing
+        self.router = get_model_router()
+        # A client set here serves every stage instead of the routed models, e.g. a fake LLM
+        self.llm = None
 
         # Load user configuration or use defaults
         self.config = self.load_user_config() if user_config is None else user_config
 
+        # Upper bound on concurrent LLM calls when generating emails or extracting chunks
+        self.max_concurrency = int(os.getenv("EMAIL_CONCURRENCY", "4"))
+
+        # Pages above this size are extracted chunk by chunk and merged
+        self.extract_chunk_tokens = int(os.getenv("EXTRACT_CHUNK_TOKENS", "5000"))
+        self.extract_overlap_tokens = int(os.getenv("EXTRACT_OVERLAP_TOKENS", "200"))
+
+        # Completions are shared through an on-disk cache across sessions and restarts
+        self.cache = get_llm_cache()
+
+        # Every LLM call goes through the process-wide rate-limit scheduler
+        self.scheduler = get_scheduler()
+        self.output_token_estimate = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "600"))
+
+        # Compact, budgeted serialization of the job and links in the email prompt
+        self.prompt_builder = PromptBuilder()
+
+        # Near-duplicate pages and jobs reuse earlier extractions and emails
+        self.duplicates = get_dedup_index()
+        self.page_shingle_size = 5
+        self.job_shingle_size = 2
+        self.prompt_stats = {"calls": 0, "prompt_tokens": 0, "tokens_saved": 0, "trimmed": 0}
+        self._stats_lock = threading.Lock()
+
     def load_user_config(self):
         """Load user configuration from file or environment variables"""
         config_file = "user_config.json"
@@ -49,8 +84,8 @@ class Chain:
             json.dump(config, f, indent=4)
         self.config = config
 
-    def extract_jobs(self, cleaned_text):
-        prompt_extract = PromptTemplate.from_template(
+    def _extract_prompt(self):
+        return PromptTemplate.from_template(
             """
             ### SCRAPED TEXT FROM WEBSITE:
             {page_data}
@@ -62,16 +97,271 @@ class Chain:
             ### VALID JSON (NO PREAMBLE):
             """
         )
-        chain_extract = prompt_extract | self.llm
-        res = chain_extract.invoke(input={"page_data": cleaned_text})
+
+    @staticmethod
+    def _client(model):
+        # Clients are shared by every Chain, so a new session or config keeps warm connections
+        return get_llm_clients().get(
+            model,
+            temperature=0,
+            # Retries are owned by the scheduler so they respect the shared rate limits
+            max_retries=0
+        )
+
+    def _models(self, stage):
+        """(model name, client) pairs to try for stage, in fallback order"""
+        if self.llm is not None:
+            return [(getattr(self.llm, "model_name", type(self.llm).__name__), self.llm)]
+        return [(model, self._client(model)) for model in self.router.candidates(stage)]
+
+    def _route_name(self, stage):
+        """Identifies the models behind stage; a fallback's answer is shared like the primary's"""
+        if self.llm is not None:
+            return getattr(self.llm, "model_name", type(self.llm).__name__)
+        return "|".join(self.router.route(stage))
+
+    def _cache_key(self, stage, prompt, inputs, config=None):
+        temperature = getattr(self.llm, "temperature", None) if self.llm is not None else 0
+        return LLMCache.make_key(stage, self._route_name(stage), temperature, prompt.format(**inputs), config)
+
+    def _dedup_namespace(self, stage, *parts):
+        """Results are only shared between texts sent to the same models with the same settings"""
+        route = self._route_name("extract" if stage == "page" else stage)
+        return "\x1f".join([stage, route] + [str(part) for part in parts])
+
+    def _find_duplicate(self, namespace, text, shingle_size):
+        with span("near_duplicate", namespace=namespace.split("\x1f")[0]) as attrs:
+            duplicate = self.duplicates.find(namespace, text, shingle_size)
+            attrs["similarity"] = round(duplicate[1], 3) if duplicate is not None else None
+            return duplicate
+
+    def _invoke(self, stage, prompt, inputs):
+        messages = prompt.invoke(inputs)
+        estimated_tokens = estimate_tokens(messages.to_string()) + self.output_token_estimate
+        models = self._models(stage)
+        for position, (model, client) in enumerate(models):
+            try:
+                return self.scheduler.call(
+                    lambda: self.router.timed(model, lambda: client.invoke(messages)), estimated_tokens)
+            except Exception:
+                if position == len(models) - 1:
+                    raise
+                self.router.record_fallback()
+
+    def _stream(self, stage, prompt, inputs):
+        messages = prompt.invoke(inputs)
+        estimated_tokens = estimate_tokens(messages.to_string()) + self.output_token_estimate
+        models = self._models(stage)
+        for position, (model, client) in enumerate(models):
+            started = False
+            try:
+                for chunk in self.scheduler.stream(
+                        lambda: self.router.timed_stream(model, client.stream(messages)), estimated_tokens):
+                    started = True
+                    yield chunk
+                return
+            except Exception:
+                # Once text has reached the reader, switching models would splice two answers
+                if started or position == len(models) - 1:
+                    raise
+                self.router.record_fallback()
+
+    def _extract_chunk(self, text, use_cache=True, outcome=None):
+        with span("extract_chunk", input_chars=len(text)) as attrs:
+            prompt_extract = self._extract_prompt()
+            inputs = {"page_data": text}
+            cache_key = self._cache_key("extract", prompt_extract, inputs)
+            cached = self.cache.get(cache_key) if use_cache else None
+            attrs["cached"] = cached is not None
+            if outcome is not None:
+                outcome["cached"].append(cached is not None)
+            if cached is not None:
+                jobs = json.loads(cached)
+                attrs["jobs"] = len(jobs)
+                return jobs
+
+            jobs = self._parse_jobs(self._invoke("extract", prompt_extract, inputs).content)
+            self.cache.set(cache_key, json.dumps(jobs))
+            attrs["jobs"] = len(jobs)
+            return jobs
+
+    @staticmethod
+    def _parse_jobs(text):
+        """Strictly parse a complete extraction; unlike JsonOutputParser, never auto-closes truncated JSON"""
         try:
-            json_parser = JsonOutputParser()
-            res = json_parser.parse(res.content)
-        except OutputParserException:
+            res = parse_json_markdown(text, parser=json.loads)
+        except ValueError:
             raise OutputParserException("Context too big. Unable to parse jobs.")
         return res if isinstance(res, list) else [res]
 
-    def write_mail(self, job, links):
+    def _page_chunks(self, cleaned_text):
+        if estimate_tokens(cleaned_text) <= self.extract_chunk_tokens:
+            return [cleaned_text]
+        return split_into_chunks(cleaned_text, self.extract_chunk_tokens, self.extract_overlap_tokens)
+
+    @staticmethod
+    def merge_jobs(job_lists):
+        """Merge per-chunk extractions, deduplicating by role, company and location"""
+        def normalize(value):
+            return " ".join(str(value or "").lower().split())
+
+        merged = {}
+        for jobs in job_lists:
+            for job in jobs:
+                if not isinstance(job, dict) or not job.get("role"):
+                    continue
+                key = (normalize(job.get("role")), normalize(job.get("company")), normalize(job.get("location")))
+                if key not in merged:
+                    merged[key] = dict(job)
+                    continue
+                # The same posting seen in an overlapping chunk: union lists, keep the fuller text
+                existing = merged[key]
+                for field, value in job.items():
+                    current = existing.get(field)
+                    if isinstance(value, list) and isinstance(current, list):
+                        existing[field] = current + [item for item in value if item not in current]
+                    elif field not in ("role", "company", "location") and \
+                            value and len(str(value)) > len(str(current or "")):
+                        existing[field] = value
+        return list(merged.values())
+
+    def _extract_chunks(self, chunks, use_cache=True, outcome=None):
+        """Yield (chunk jobs, error) for each chunk as its extraction finishes"""
+        max_workers = min(self.max_concurrency, len(chunks))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [submit(executor, self._extract_chunk, chunk, use_cache, outcome) for chunk in chunks]
+            for future in as_completed(futures):
+                try:
+                    yield future.result(), None
+                except Exception as e:
+                    if outcome is not None:
+                        outcome["errors"] += 1
+                    yield [], e
+
+    @staticmethod
+    def _new_outcome():
+        """How an extraction was produced: per-chunk response-cache hits and failed chunks"""
+        return {"cached": [], "errors": 0}
+
+    def _page_match(self, namespace, cleaned_text, url):
+        """(URL, jobs) stored for the closest earlier page, or None"""
+        if not url:
+            return None
+        duplicate = self._find_duplicate(namespace, cleaned_text, self.page_shingle_size)
+        if duplicate is None:
+            return None
+        stored = json.loads(duplicate[0])
+        if not isinstance(stored, dict) or not stored.get("url"):
+            return None
+        return stored["url"], stored["jobs"]
+
+    @staticmethod
+    def _reusable_page(match, url, use_cache):
+        """Jobs of a near-duplicate page at another URL, else None.
+
+        A page seen before at the same URL is never reused: an edit that adds or drops one
+        of many postings still looks near-identical, and the exact text is cached anyway.
+        """
+        if not use_cache or match is None or match[0] == url:
+            return None
+        return match[1]
+
+    def _add_page(self, namespace, cleaned_text, url, jobs, outcome, match):
+        """Fingerprint a fresh, complete extraction, unless this URL already has the same one stored"""
+        if not url or outcome["errors"] or all(outcome["cached"]) or match == (url, jobs):
+            return
+        self.duplicates.add(namespace, cleaned_text, json.dumps({"url": url, "jobs": jobs}),
+                            self.page_shingle_size)
+
+    def extract_jobs(self, cleaned_text, use_cache=True, url=None):
+        namespace = self._dedup_namespace("page")
+        match = self._page_match(namespace, cleaned_text, url)
+        duplicate = self._reusable_page(match, url, use_cache)
+        if duplicate is not None:
+            return duplicate
+        outcome = self._new_outcome()
+        jobs = self._extract_jobs(cleaned_text, use_cache, outcome)
+        self._add_page(namespace, cleaned_text, url, jobs, outcome, match)
+        return jobs
+
+    def _extract_jobs(self, cleaned_text, use_cache=True, outcome=None):
+        chunks = self._page_chunks(cleaned_text)
+        if len(chunks) <= 1:
+            return self._extract_chunk(cleaned_text, use_cache, outcome)
+
+        job_lists = []
+        errors = []
+        for jobs, error in self._extract_chunks(chunks, use_cache, outcome):
+            job_lists.append(jobs)
+            if error is not None:
+                errors.append(error)
+        # A single unparsable chunk should not sink the whole page
+        if len(errors) == len(chunks):
+            raise errors[0]
+        return self.merge_jobs(job_lists)
+
+    def stream_extract_jobs(self, cleaned_text, use_cache=True, url=None):
+        """Yield the list of jobs parsed so far while the extraction streams in.
+
+        Intermediate lists may end with a partially filled job; the last one yielded is complete.
+        Large pages are extracted in parallel chunks and yield the merged list after each chunk.
+        A near-duplicate of a page extracted before at another URL yields that page's jobs at once.
+        """
+        namespace = self._dedup_namespace("page")
+        match = self._page_match(namespace, cleaned_text, url)
+        duplicate = self._reusable_page(match, url, use_cache)
+        if duplicate is not None:
+            yield duplicate
+            return
+        outcome = self._new_outcome()
+        jobs = None
+        for jobs in self._stream_extract_jobs(cleaned_text, use_cache, outcome):
+            yield jobs
+        if jobs is not None:
+            self._add_page(namespace, cleaned_text, url, jobs, outcome, match)
+
+    def _stream_extract_jobs(self, cleaned_text, use_cache=True, outcome=None):
+        chunks = self._page_chunks(cleaned_text)
+        if len(chunks) > 1:
+            job_lists = []
+            errors = []
+            for jobs, error in self._extract_chunks(chunks, use_cache, outcome):
+                job_lists.append(jobs)
+                if error is not None:
+                    errors.append(error)
+                    continue
+                yield self.merge_jobs(job_lists)
+            if len(errors) == len(chunks):
+                raise errors[0]
+            return
+
+        prompt_extract = self._extract_prompt()
+        inputs = {"page_data": cleaned_text}
+        cache_key = self._cache_key("extract", prompt_extract, inputs)
+        cached = self.cache.get(cache_key) if use_cache else None
+        if outcome is not None:
+            outcome["cached"].append(cached is not None)
+        if cached is not None:
+            yield json.loads(cached)
+            return
+
+        parts = []
+
+        def collect(chunks):
+            for chunk in chunks:
+                parts.append(chunk.content if isinstance(chunk.content, str) else "")
+                yield chunk
+
+        # Partial parses only drive the live preview; they never raise and may be auto-closed
+        for res in JsonOutputParser().transform(collect(self._stream("extract", prompt_extract, inputs))):
+            yield res if isinstance(res, list) else [res]
+        # Only a strictly valid, complete answer is final and cached
+        jobs = self._parse_jobs("".join(parts))
+        yield jobs
+        self.cache.set(cache_key, json.dumps(jobs))
+
+    def _email_prompt(self, job, links):
+        """Build the email prompt and its inputs for one job"""
         # Determine email tone instructions
         tone_instructions = {
             "professional": "Write in a professional yet approachable tone.",
@@ -121,10 +411,10 @@ class Chain:
             """
         )
 
-        chain_email = prompt_email | self.llm
-        res = chain_email.invoke({
-            "job_description": str(job),
-            "link_list": links,
+        job_text, links_text, report = self.prompt_builder.build(job, links)
+        inputs = {
+            "job_description": job_text,
+            "link_list": links_text,
             "sender_name": self.config["sender_name"],
             "sender_title": self.config["sender_title"],
             "company_name": self.config["company_name"],
@@ -133,8 +423,133 @@ class Chain:
             "company_achievements": self.config["company_achievements"],
             "tone_instruction": tone_instructions,
             "signature_instruction": signature_instructions
-        })
-        return res.content
+        }
+        self._record_prompt(report, estimate_tokens(prompt_email.format(**inputs)))
+        return prompt_email, inputs
+
+    def _record_prompt(self, report, prompt_tokens):
+        with self._stats_lock:
+            self.prompt_stats["calls"] += 1
+            self.prompt_stats["prompt_tokens"] += prompt_tokens
+            self.prompt_stats["tokens_saved"] += report["tokens_saved"]
+            self.prompt_stats["trimmed"] += int(report["trimmed"])
+
+    def config_hash(self):
+        """Short, stable hash of the sender configuration the emails are written with"""
+        return hashlib.sha256(json.dumps(self.config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+    def _email_namespace(self, job):
+        # Role, company and location must match exactly, the key merge_jobs uses: the same
+        # template posted for another city or company must not get an email naming the first
+        job = job if isinstance(job, dict) else {}
+        fields = [" ".join(str(job.get(field) or "").lower().split()) for field in ("role", "company", "location")]
+        return self._dedup_namespace("email", self.config_hash(), *fields)
+
+    def _stored_email(self, job, prompt_email, inputs, use_cache, attrs):
+        """Return the email from the response cache or a near-duplicate job, else None"""
+        if not use_cache:
+            attrs["cached"] = False
+            return None
+        cached = self.cache.get(self._cache_key("email", prompt_email, inputs, self.config))
+        if cached is None:
+            duplicate = self._find_duplicate(self._email_namespace(job), self._email_text(inputs),
+                                             self.job_shingle_size)
+            cached = duplicate[0] if duplicate is not None else None
+        attrs["cached"] = cached is not None
+        return cached
+
+    def _store_email(self, job, prompt_email, inputs, email):
+        self.cache.set(self._cache_key("email", prompt_email, inputs, self.config), email)
+        self.duplicates.add(self._email_namespace(job), self._email_text(inputs), email, self.job_shingle_size)
+
+    @staticmethod
+    def _email_text(inputs):
+        return inputs["job_description"] + "\n" + inputs["link_list"]
+
+    def write_mail(self, job, links, use_cache=True):
+        with span("write_mail", role=job.get("role") if isinstance(job, dict) else None) as attrs:
+            prompt_email, inputs = self._email_prompt(job, links)
+            attrs["input_chars"] = len(inputs["job_description"]) + len(inputs["link_list"])
+            cached = self._stored_email(job, prompt_email, inputs, use_cache, attrs)
+            if cached is not None:
+                attrs["output_chars"] = len(cached)
+                return cached
+
+            email = self._invoke("email", prompt_email, inputs).content
+            self._store_email(job, prompt_email, inputs, email)
+            attrs["output_chars"] = len(email)
+            return email
+
+    def stream_mail(self, job, links, use_cache=True):
+        """Yield the email for one job chunk by chunk as the model produces it"""
+        with span("write_mail", role=job.get("role") if isinstance(job, dict) else None) as attrs:
+            prompt_email, inputs = self._email_prompt(job, links)
+            attrs["input_chars"] = len(inputs["job_description"]) + len(inputs["link_list"])
+            cached = self._stored_email(job, prompt_email, inputs, use_cache, attrs)
+            if cached is not None:
+                attrs["output_chars"] = len(cached)
+                yield cached
+                return
+
+            parts = []
+            for chunk in self._stream("email", prompt_email, inputs):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield chunk.content
+            email = "".join(parts)
+            self._store_email(job, prompt_email, inputs, email)
+            attrs["output_chars"] = len(email)
+
+    def write_mails(self, jobs, max_workers=None, refresh=()):
+        """Generate emails for several jobs concurrently.
+
+        jobs maps a caller-chosen key to a (job, links) pair. Yields (key, email, error)
+        as soon as each generation finishes, so callers can render results progressively.
+        Keys listed in refresh bypass the response cache.
+        """
+        if not jobs:
+            return
+        max_workers = min(max_workers or self.max_concurrency, len(jobs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {submit(executor, self.write_mail, job, links, key not in refresh): key
+                       for key, (job, links) in jobs.items()}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def stream_mails(self, jobs, max_workers=None, refresh=()):
+        """Stream emails for several jobs concurrently.
+
+        jobs maps a caller-chosen key to a (job, links) pair. Yields (key, text, done, error)
+        events: text is the next chunk while done is False, and the full email once done is True.
+        Keys listed in refresh bypass the response cache.
+        """
+        if not jobs:
+            return
+        events = queue.Queue()
+
+        def produce(key, job, links):
+            parts = []
+            try:
+                for chunk in self.stream_mail(job, links, key not in refresh):
+                    parts.append(chunk)
+                    events.put((key, chunk, False, None))
+                events.put((key, "".join(parts), True, None))
+            except Exception as e:
+                events.put((key, None, True, e))
+
+        max_workers = min(max_workers or self.max_concurrency, len(jobs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key, (job, links) in jobs.items():
+                submit(executor, produce, key, job, links)
+            remaining = len(jobs)
+            while remaining:
+                event = events.get()
+                if event[2]:
+                    remaining -= 1
+                yield event
 
     def update_config(self, **kwargs):
         """Update configuration with new values"""
@@ -0,0 +1,170 @@
+import os
+import time
+import zlib
+import sqlite3
+import threading
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+# Shingle hashes are processed in blocks so multi-megabyte pages stay within a few MB
+_BLOCK = 50000
+
+
+def shingle_hashes(text, size):
+    """CRC32 of every run of size consecutive words, lower-cased"""
+    words = str(text).lower().split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                       dtype=np.uint64, count=len(shingles))
+
+
+class NearDuplicateIndex:
+    """MinHash fingerprints of texts with the result computed for each of them.
+
+    Texts are compared by the estimated Jaccard similarity of their word shingles, so
+    the same posting on another board or URL, with different navigation, tracking
+    text or whitespace, finds the stored result. Fingerprints live in SQLite and are
+    mirrored in memory as one signature matrix per namespace for a vectorized scan.
+    """
+
+    def __init__(self, path=None, threshold=None, num_perm=None, max_entries=None, ttl=None):
+        self.path = path or os.getenv("DEDUP_PATH", "cache/fingerprints.sqlite3")
+        self.threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+        self.num_perm = num_perm or int(os.getenv("DEDUP_NUM_PERM", "64"))
+        self.max_entries = max_entries or int(os.getenv("DEDUP_MAX_ENTRIES", "5000"))
+        self.ttl = ttl if ttl is not None else int(os.getenv("DEDUP_TTL", str(7 * 24 * 3600)))
+        self.hits = 0
+        self.misses = 0
+        # Fixed seed: signatures must stay comparable across restarts
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, 1 << 31, size=self.num_perm).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=self.num_perm).astype(np.uint64)
+        self._lock = threading.Lock()
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_created ON fingerprints (created_at)")
+        self._conn.commit()
+        self._load()
+
+    @property
+    def enabled(self):
+        """DEDUP_THRESHOLD=0 turns near-duplicate reuse off"""
+        return 0 < self.threshold <= 1
+
+    def _load(self):
+        """(Re)build the in-memory signature matrices from the table"""
+        if self.ttl:
+            self._conn.execute("DELETE FROM fingerprints WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+        rows = {}
+        for row_id, namespace, signature in self._conn.execute(
+                "SELECT id, namespace, signature FROM fingerprints ORDER BY id"):
+            vector = np.frombuffer(signature, dtype=np.uint64)
+            if len(vector) == self.num_perm:
+                rows.setdefault(namespace, ([], []))
+                rows[namespace][0].append(row_id)
+                rows[namespace][1].append(vector)
+        self._matrices = {namespace: (ids, np.vstack(vectors)) for namespace, (ids, vectors) in rows.items()}
+
+    def signature(self, text, shingle_size):
+        hashes = shingle_hashes(text, shingle_size)
+        if not len(hashes):
+            return None
+        signature = np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK):
+            block = hashes[start:start + _BLOCK]
+            permuted = (self._a[:, None] * block[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+            signature = np.minimum(signature, permuted.min(axis=1))
+        return signature
+
+    def find(self, namespace, text, shingle_size=5):
+        """Return (stored result, similarity) for the closest text at or above the threshold"""
+        if not self.enabled:
+            return None
+        signature = self.signature(text, shingle_size)
+        with self._lock:
+            ids, matrix = self._matrices.get(namespace, ([], None))
+            if signature is None or matrix is None:
+                self.misses += 1
+                return None
+            similarities = (matrix == signature).mean(axis=1)
+            # Prefer the newest of equally close entries, e.g. a regenerated email
+            best = len(similarities) - 1 - int(similarities[::-1].argmax())
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            row = self._conn.execute("SELECT result FROM fingerprints WHERE id = ?", (ids[best],)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0], float(similarities[best])
+
+    def add(self, namespace, text, result, shingle_size=5):
+        if not self.enabled:
+            return
+        signature = self.signature(text, shingle_size)
+        if signature is None:
+            return
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO fingerprints (namespace, signature, result, created_at) VALUES (?, ?, ?, ?)",
+                (namespace, signature.tobytes(), result, time.time()))
+            self._conn.commit()
+            ids, matrix = self._matrices.get(namespace, ([], None))
+            matrix = signature[None, :] if matrix is None else np.vstack([matrix, signature])
+            self._matrices[namespace] = (ids + [cursor.lastrowid], matrix)
+
+            count = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+            if count > self.max_entries:
+                # Evict down to 90% so the matrices are not rebuilt on every insert
+                self._conn.execute("""
+                    DELETE FROM fingerprints WHERE id IN (
+                        SELECT id FROM fingerprints ORDER BY created_at LIMIT ?
+                    )
+                """, (count - int(self.max_entries * 0.9),))
+                self._conn.commit()
+                self._load()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM fingerprints")
+            self._conn.commit()
+            self._matrices = {}
+
+    def stats(self):
+        with self._lock:
+            entries = sum(len(ids) for ids, _ in self._matrices.values())
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "hit_rate": self.hits / lookups if lookups else 0.0, "threshold": self.threshold}
+
+
+_dedup_lock = threading.Lock()
+_dedup_index = None
+
+
+def get_dedup_index():
+    """Return the process-wide near-duplicate index"""
+    global _dedup_index
+    with _dedup_lock:
+        if _dedup_index is None:
+            _dedup_index = NearDuplicateIndex()
+        return _dedup_index
@@ -0,0 +1,183 @@
+import os
+import csv
+import io
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+# Columns of a draft, in the order they are exported
+DRAFT_FIELDS = ["id", "created_at", "url", "company", "role", "location", "experience", "skills",
+                "config_hash", "email"]
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted, so input such as 'node.js' or 'C++' is never read as query syntax.
+    """
+    words = str(text).split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+class DraftStore:
+    """Saved email drafts in SQLite, with a full-text index over the email and job fields.
+
+    Drafts are only ever appended, so saving is one insert no matter how many exist,
+    and search, paging and export never scan loose files.
+    """
+
+    def __init__(self, path=None):
+        # User data, kept apart from cache/ so clearing the caches never deletes drafts
+        self.path = path or os.getenv("DRAFT_STORE_PATH", "data/drafts.sqlite3")
+        self._lock = threading.Lock()
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS drafts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at REAL NOT NULL,
+                url TEXT NOT NULL,
+                company TEXT,
+                role TEXT,
+                location TEXT,
+                experience TEXT,
+                skills TEXT,
+                config_hash TEXT,
+                email TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_drafts_url ON drafts (url)")
+        # External-content FTS table kept in sync by triggers, so the text is stored once
+        self._conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS drafts_fts USING fts5(
+                email, company, role, skills, url, content='drafts', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS drafts_ai AFTER INSERT ON drafts BEGIN
+                INSERT INTO drafts_fts (rowid, email, company, role, skills, url)
+                VALUES (new.id, new.email, new.company, new.role, new.skills, new.url);
+            END;
+            CREATE TRIGGER IF NOT EXISTS drafts_ad AFTER DELETE ON drafts BEGIN
+                INSERT INTO drafts_fts (drafts_fts, rowid, email, company, role, skills, url)
+                VALUES ('delete', old.id, old.email, old.company, old.role, old.skills, old.url);
+            END;
+        """)
+        self._conn.commit()
+
+    def save(self, url, job, email, config_hash=None):
+        """Append a draft and return its id"""
+        job = job if isinstance(job, dict) else {}
+        skills = job.get("skills") or []
+        if not isinstance(skills, str):
+            skills = ", ".join(str(skill) for skill in skills)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO drafts (created_at, url, company, role, location, experience, skills, config_hash, email) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), url, job.get("company"), job.get("role"), job.get("location"),
+                 job.get("experience"), skills, config_hash, email))
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _where(self, query):
+        """SQL condition and parameters selecting the drafts matching query, if any"""
+        match = fts_query(query or "")
+        if not match:
+            return "", []
+        return "WHERE id IN (SELECT rowid FROM drafts_fts WHERE drafts_fts MATCH ?)", [match]
+
+    def count(self, query=None):
+        where, params = self._where(query)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM drafts {where}", params).fetchone()[0]
+
+    def search(self, query=None, limit=20, offset=0):
+        """One page of drafts matching query, newest first, as dicts"""
+        where, params = self._where(query)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(DRAFT_FIELDS)} FROM drafts {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+        return [dict(zip(DRAFT_FIELDS, row)) for row in rows]
+
+    def get(self, draft_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(DRAFT_FIELDS)} FROM drafts WHERE id = ?",
+                                     (draft_id,)).fetchone()
+        return dict(zip(DRAFT_FIELDS, row)) if row is not None else None
+
+    def delete(self, draft_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM drafts WHERE id = ?", (draft_id,))
+            self._conn.commit()
+
+    def iter_drafts(self, query=None, batch_size=500):
+        """Yield every matching draft, oldest first, reading batch_size rows at a time"""
+        where, params = self._where(query)
+        where = f"{where} AND id > ?" if where else "WHERE id > ?"
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(DRAFT_FIELDS)} FROM drafts {where} ORDER BY id LIMIT ?",
+                    params + [last_id, batch_size]).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(DRAFT_FIELDS, row))
+            last_id = rows[-1][0]
+
+    def export(self, fmt="jsonl", query=None):
+        """Yield the matching drafts as JSON lines or CSV text, one draft per piece"""
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=DRAFT_FIELDS)
+            writer.writeheader()
+            for draft in self.iter_drafts(query):
+                writer.writerow(draft)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            for draft in self.iter_drafts(query):
+                yield json.dumps(draft, ensure_ascii=False) + "\n"
+
+    def export_to_file(self, path, fmt="jsonl", query=None):
+        """Stream the matching drafts into path and return how many were written"""
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for piece in self.export(fmt, query):
+                f.write(piece)
+                count += 1
+        # The CSV export yields one extra piece, which carries the header row
+        return count - 1 if fmt == "csv" else count
+
+
+_draft_store_lock = threading.Lock()
+_draft_store = None
+
+
+def get_draft_store():
+    """Return the process-wide draft store"""
+    global _draft_store
+    with _draft_store_lock:
+        if _draft_store is None:
+            _draft_store = DraftStore()
+        return _draft_store
+
+
+if __name__ == "__main__":
+    # Stream every draft, or those matching a search, to a file without loading them all:
+    #   python app/draft_store.py drafts.jsonl [search words]
+    #   python app/draft_store.py drafts.csv [search words]
+    if len(sys.argv) < 2:
+        sys.exit("usage: draft_store.py OUTPUT.jsonl|OUTPUT.csv [search words]")
+    output = sys.argv[1]
+    count = get_draft_store().export_to_file(output, "csv" if output.endswith(".csv") else "jsonl",
+                                             " ".join(sys.argv[2:]))
+    print(f"Exported {count} drafts to {output}")
@@ -0,0 +1,173 @@
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class SpillStore:
+    """SQLite table holding email bodies evicted from session memory, shared by all sessions"""
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or os.getenv("SESSION_EMAIL_PATH", "cache/session_emails.sqlite3")
+        self.ttl = ttl if ttl is not None else int(os.getenv("SESSION_EMAIL_TTL", str(24 * 3600)))
+        # Sessions end without notice, so expired rows are purged at most this often while writing
+        self.purge_interval = float(os.getenv("SESSION_EMAIL_PURGE_INTERVAL", "600"))
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_emails (
+                session_id TEXT NOT NULL,
+                job_key TEXT NOT NULL,
+                email TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (session_id, job_key)
+            )
+        """)
+        self._purge()
+        self._conn.commit()
+
+    def _purge(self):
+        """Delete what abandoned sessions left behind longer than the TTL ago"""
+        if self.ttl:
+            self._conn.execute("DELETE FROM session_emails WHERE updated_at < ?", (time.time() - self.ttl,))
+        self._purged_at = time.monotonic()
+
+    def put(self, session_id, job_key, email):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_emails (session_id, job_key, email, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, job_key, email, time.time()))
+            if time.monotonic() - self._purged_at >= self.purge_interval:
+                self._purge()
+            self._conn.commit()
+
+    def pop(self, session_id, job_key):
+        with self._lock:
+            row = self._conn.execute("SELECT email FROM session_emails WHERE session_id = ? AND job_key = ?",
+                                     (session_id, job_key)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM session_emails WHERE session_id = ? AND job_key = ?",
+                                   (session_id, job_key))
+                self._conn.commit()
+            return row[0] if row is not None else None
+
+    def delete(self, session_id, job_key=None):
+        with self._lock:
+            if job_key is None:
+                self._conn.execute("DELETE FROM session_emails WHERE session_id = ?", (session_id,))
+            else:
+                self._conn.execute("DELETE FROM session_emails WHERE session_id = ? AND job_key = ?",
+                                   (session_id, job_key))
+            self._conn.commit()
+
+
+_spill_lock = threading.Lock()
+_spill_store = None
+
+
+def get_spill_store():
+    """Return the process-wide spill table"""
+    global _spill_store
+    with _spill_lock:
+        if _spill_store is None:
+            _spill_store = SpillStore()
+        return _spill_store
+
+
+class SessionEmailStore:
+    """Dict-like store of one session's generated emails with a bounded memory footprint.
+
+    The most recently used emails stay in memory; older ones spill to disk and are
+    loaded back when read. Every stored key is kept with a hash of its email, so len(),
+    membership and re-storing an unchanged email never touch the disk.
+    """
+
+    def __init__(self, memory_entries=None, spill_store=None):
+        self.session_id = uuid.uuid4().hex
+        self.memory_entries = memory_entries or int(os.getenv("SESSION_EMAIL_MEMORY", "20"))
+        self.spill_store = spill_store or get_spill_store()
+        self._memory = OrderedDict()
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def __setitem__(self, job_key, email):
+        with self._lock:
+            if self._hashes.get(job_key) == hash(email):
+                return
+            if job_key in self._hashes and job_key not in self._memory:
+                self.spill_store.delete(self.session_id, job_key)
+            self._hashes[job_key] = hash(email)
+            self._memory[job_key] = email
+            self._memory.move_to_end(job_key)
+            while len(self._memory) > self.memory_entries:
+                spilled_key, spilled_email = self._memory.popitem(last=False)
+                self.spill_store.put(self.session_id, spilled_key, spilled_email)
+
+    def __getitem__(self, job_key):
+        email = self.get(job_key)
+        if email is None:
+            raise KeyError(job_key)
+        return email
+
+    def get(self, job_key, default=None):
+        with self._lock:
+            if job_key not in self._hashes:
+                return default
+            if job_key in self._memory:
+                self._memory.move_to_end(job_key)
+                return self._memory[job_key]
+            email = self.spill_store.pop(self.session_id, job_key)
+            if email is None:
+                # Expired from disk while the session was idle
+                del self._hashes[job_key]
+                return default
+            del self._hashes[job_key]
+        # Reloaded entries are the most recent again
+        self[job_key] = email
+        return email
+
+    def __contains__(self, job_key):
+        return job_key in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __delitem__(self, job_key):
+        with self._lock:
+            if job_key not in self._hashes:
+                raise KeyError(job_key)
+            del self._hashes[job_key]
+            if self._memory.pop(job_key, None) is None:
+                self.spill_store.delete(self.session_id, job_key)
+
+    def keys(self):
+        with self._lock:
+            return list(self._hashes)
+
+    def for_url(self, url):
+        """Stored emails for one URL, as {position index: email}"""
+        emails = {}
+        for job_key in self.keys():
+            key_url, _, idx = job_key.rpartition("_")
+            if key_url == url and idx.isdigit():
+                email = self.get(job_key)
+                if email is not None:
+                    emails[int(idx)] = email
+        return emails
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._hashes.clear()
+            self.spill_store.delete(self.session_id)
+
+    def memory_size(self):
+        with self._lock:
+            return len(self._memory)
@@ -0,0 +1,146 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Case- and whitespace-insensitive form of a query; the default MiniLM model is uncased"""
+    return " ".join(str(text).lower().split())
+
+
+class EmbeddingCache:
+    """Two-level cache of query embeddings: an in-memory LRU in front of a SQLite table.
+
+    Vectors are keyed by the embedding model and the normalized text, so "Python" and
+    " python " share one entry, and switching models never returns a stale vector.
+    """
+
+    def __init__(self, path=None, memory_entries=None, max_entries=None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3")
+        self.memory_entries = memory_entries or int(os.getenv("EMBEDDING_CACHE_MEMORY", "4096"))
+        self.max_entries = max_entries or int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.embed_calls = 0
+        self.embed_seconds = 0.0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model, text):
+        return hashlib.sha256(f"{model}\x1f{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def embed(self, texts, embedding_function, model):
+        """Return one vector per text, embedding only the texts neither level has seen"""
+        keys = [self.make_key(model, text) for text in texts]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    vectors[key] = self._memory[key]
+            self.memory_hits += len(vectors)
+
+            on_disk = [key for key in dict.fromkeys(keys) if key not in vectors]
+            # Stay under SQLite's limit on bound parameters per statement
+            for start in range(0, len(on_disk), 500):
+                batch = on_disk[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch).fetchall()
+                for key, blob in rows:
+                    vectors[key] = array("f", blob).tolist()
+                    self._remember(key, vectors[key])
+                if rows:
+                    self._conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                                           [(time.time(), key) for key, _ in rows])
+                    self._conn.commit()
+                self.disk_hits += len(rows)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                # Only the key is normalized; documents are embedded as written, so queries are too
+                missing.setdefault(key, text)
+        if missing:
+            started = time.perf_counter()
+            computed = embedding_function(list(missing.values()))
+            elapsed = time.perf_counter() - started
+            now = time.time()
+            with self._lock:
+                self.misses += len(missing)
+                self.embed_calls += 1
+                self.embed_seconds += elapsed
+                for key, vector in zip(missing, computed):
+                    vectors[key] = [float(value) for value in vector]
+                    self._remember(key, vectors[key])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                    [(key, array("f", vectors[key]).tobytes(), now) for key in missing])
+                self._evict()
+                self._conn.commit()
+        return [vectors[key] for key in keys]
+
+    def _evict(self):
+        overflow = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute("""
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?
+                )
+            """, (overflow,))
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def stats(self):
+        """Hit counters per level and the average latency of the embedding calls made"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                    "memory_entries": len(self._memory), "entries": entries,
+                    "embed_calls": self.embed_calls,
+                    "avg_embed_ms": self.embed_seconds / self.embed_calls * 1000 if self.embed_calls else 0.0}
+
+
+_embedding_cache_lock = threading.Lock()
+_embedding_cache = None
+
+
+def get_embedding_cache():
+    """Return the process-wide embedding cache"""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+        return _embedding_cache
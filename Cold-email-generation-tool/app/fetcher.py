@@ -0,0 +1,110 @@
+import os
+import atexit
+import asyncio
+import threading
+import aiohttp
+import charset_normalizer
+from langchain_community.document_loaders.web_base import default_header_template
+
+
+class PageTooLarge(Exception):
+    pass
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, url, status):
+        super().__init__(f"HTTP {status} for url: {url}")
+        self.url = url
+        self.status = status
+
+
+class FetchResult:
+    def __init__(self, url, status, headers, text):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.text = text
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+
+class PageFetcher:
+    """Async HTTP fetcher with one keep-alive connection pool per process.
+
+    The pool lives on a dedicated event loop thread, so synchronous callers (the
+    Streamlit script thread, batch workers) share connections through run().
+    """
+
+    def __init__(self, max_connections=None, per_host=None, timeout=None, max_bytes=None):
+        self.max_connections = max_connections or int(os.getenv("FETCH_MAX_CONNECTIONS", "32"))
+        self.per_host = per_host or int(os.getenv("FETCH_PER_HOST", "4"))
+        self.timeout = timeout or float(os.getenv("FETCH_TIMEOUT", "20"))
+        self.max_bytes = max_bytes or int(os.getenv("FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="page-fetcher", daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        """Run a coroutine on the fetcher loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=default_header_template,
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def fetch(self, url, headers=None):
+        """GET a page and decode its body.
+
+        Uses the declared charset when the server sends one, otherwise detects it the
+        way requests' apparent_encoding does (off the loop, since detection is slow).
+        """
+        session = await self._get_session()
+        async with session.get(url, headers=headers or {}) as response:
+            if response.content_length and response.content_length > self.max_bytes:
+                raise PageTooLarge(f"{url} is {response.content_length} bytes (limit {self.max_bytes})")
+            body = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise PageTooLarge(f"{url} exceeds {self.max_bytes} bytes")
+            body = bytes(body)
+            encoding = response.charset
+            if encoding is None:
+                detected = await asyncio.get_running_loop().run_in_executor(None, charset_normalizer.detect, body)
+                encoding = detected["encoding"] or "utf-8"
+            try:
+                text = body.decode(encoding, errors="replace")
+            except LookupError:
+                text = body.decode("utf-8", errors="replace")
+            return FetchResult(url, response.status, dict(response.headers), text)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def shutdown(self):
+        """Close the connection pool and stop the loop thread"""
+        self.run(self.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_fetcher_lock = threading.Lock()
+_fetcher = None
+
+
+def get_fetcher():
+    """Return the process-wide page fetcher"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = PageFetcher()
+            atexit.register(_fetcher.shutdown)
+        return _fetcher
@@ -0,0 +1,219 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from startup import lazy_import
+from tracing import begin_trace, end_trace, span
+
+class GenerationJob:
+    """Progress and results of one URL's generation, updated by a worker thread.
+
+    The UI only ever reads snapshot(), so a rerun can attach to a job at any point
+    and render exactly what has been produced so far.
+    """
+
+    def __init__(self, url, chain, clean_text, known_emails=None, owner=None):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.url = url
+        self.chain = chain
+        self.clean_text = clean_text
+        self.known_emails = dict(known_emails or {})
+        self.status = "queued"
+        self.jobs = []
+        self.links = []
+        self.notice = None
+        self.error = None
+        self.emails = {}
+        self.partial = {}
+        self.email_errors = {}
+        # Bumped whenever a position's email is replaced, so the UI can reset its editor
+        self.email_versions = {}
+        self.writing = set()
+        self.trace = None
+        self.created_at = time.time()
+        self.accessed_at = self.created_at
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id, "url": self.url, "status": self.status, "jobs": list(self.jobs),
+                "notice": self.notice, "error": self.error, "emails": dict(self.emails),
+                "partial": dict(self.partial), "email_errors": dict(self.email_errors),
+                "email_versions": dict(self.email_versions), "writing": set(self.writing),
+                "trace": self.trace, "finished": self.finished,
+            }
+
+    def _email_started(self, idx):
+        with self._lock:
+            self.writing.add(idx)
+            self.partial[idx] = ""
+            self.email_errors.pop(idx, None)
+
+    def _email_chunk(self, idx, text):
+        with self._lock:
+            self.partial[idx] = self.partial.get(idx, "") + text
+
+    def _email_finished(self, idx, email=None, error=None):
+        with self._lock:
+            self.writing.discard(idx)
+            self.partial.pop(idx, None)
+            if error is not None:
+                self.email_errors[idx] = str(error)
+            else:
+                self.emails[idx] = email
+                self.email_versions[idx] = self.email_versions.get(idx, 0) + 1
+
+
+class GenerationManager:
+    """Runs generations on a worker pool, independent of any Streamlit script run.
+
+    Jobs are looked up by id, so a rerun (or a second tab) attaches to work already in
+    flight instead of cancelling or repeating the fetch and LLM calls. Finished jobs
+    are kept per owning session: a busy session only evicts its own older jobs, and a
+    session's jobs are dropped once nobody has looked at them for idle_ttl seconds.
+    """
+
+    def __init__(self, max_workers=None, max_jobs=None, idle_ttl=None):
+        self.max_workers = max_workers or int(os.getenv("GENERATION_WORKERS", "4"))
+        # Finished jobs kept for each session
+        self.max_jobs = max_jobs or int(os.getenv("GENERATION_MAX_JOBS", "5"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("GENERATION_IDLE_TTL", str(24 * 3600)))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="generation")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url, chain, clean_text, known_emails=None, owner=None):
+        """Start generating for url on behalf of the owner session and return the job id.
+
+        A generation already running for the same URL and chain is returned instead of
+        starting another one.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.url == url and job.chain is chain and not job.finished:
+                    return job.id
+            job = GenerationJob(url, chain, clean_text, known_emails, owner)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.accessed_at = time.time()
+            return job
+
+    def regenerate(self, job_id, idx):
+        """Rewrite one position's email in the background, bypassing the response cache"""
+        job = self.get(job_id)
+        if job is None or idx >= len(job.jobs):
+            return False
+        with job._lock:
+            if idx in job.writing:
+                return True
+            job.writing.add(idx)
+        links = job.links[idx] if idx < len(job.links) else []
+        self._executor.submit(self._write, job, idx, job.jobs[idx], links, False)
+        return True
+
+    def _prune(self):
+        """Forget finished jobs that have been idle too long, and each session's oldest beyond max_jobs"""
+        cutoff = time.time() - self.idle_ttl
+        by_owner = {}
+        for job in sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True):
+            by_owner.setdefault(job.owner, []).append(job)
+        for jobs in by_owner.values():
+            for position, job in enumerate(jobs):
+                if job.finished and (position >= self.max_jobs or job.accessed_at < cutoff):
+                    del self._jobs[job.id]
+
+    def _write(self, job, idx, posting, links, use_cache):
+        job._email_started(idx)
+        try:
+            parts = []
+            for chunk in job.chain.stream_mail(posting, links, use_cache):
+                parts.append(chunk)
+                job._email_chunk(idx, chunk)
+            job._email_finished(idx, email="".join(parts))
+        except Exception as e:
+            job._email_finished(idx, error=e)
+
+    def _run(self, job):
+        trace = begin_trace("generate", url=job.url)
+        try:
+            chain = job.chain
+            job.update(status="fetching")
+            # Shared across sessions and reruns; rebuilt only when the CSV or vector store changes
+            portfolio = lazy_import("portfolio").get_portfolio()
+            data = lazy_import("page_cache").load_page(job.url, job.clean_text)
+
+            portfolio_loaded = False
+            try:
+                portfolio_loaded = portfolio.load_portfolio()
+            except Exception:
+                job.update(notice="No portfolio file found. Generating email without portfolio links.")
+
+            job.update(status="extracting")
+            jobs = []
+            with span("extract_jobs", input_chars=len(data)) as attrs:
+                for jobs in chain.stream_extract_jobs(data, url=job.url):
+                    job.update(jobs=list(jobs))
+                attrs["jobs"] = len(jobs)
+
+            job.update(status="matching")
+            links = [[] for _ in jobs]
+            if portfolio_loaded:
+                try:
+                    links = portfolio.query_links_batch([posting.get('skills', []) for posting in jobs])
+                except Exception:
+                    links = [[] for _ in jobs]
+            job.update(links=links)
+
+            job.update(status="writing")
+            pending = {}
+            for idx, posting in enumerate(jobs):
+                if idx in job.known_emails:
+                    job._email_finished(idx, email=job.known_emails[idx])
+                else:
+                    pending[idx] = (posting, links[idx])
+            for idx in pending:
+                job._email_started(idx)
+            for idx, text, done, error in chain.stream_mails(pending):
+                if not done:
+                    job._email_chunk(idx, text)
+                else:
+                    job._email_finished(idx, email=text, error=error)
+            job.update(status="done")
+        except Exception as e:
+            job.update(status="failed", error=str(e))
+        finally:
+            end_trace(trace)
+            job.update(trace=trace.to_dict(), finished_at=time.time())
+
+
+_manager_lock = threading.Lock()
+_manager = None
+
+
+def get_generation_manager():
+    """Return the process-wide generation worker pool"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = GenerationManager()
+        return _manager
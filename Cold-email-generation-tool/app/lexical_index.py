@@ -0,0 +1,103 @@
+import os
+import re
+import heapq
+import threading
+from itertools import islice
+
+# Alternative spellings mapped onto the compact key of the canonical skill
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "nodejs",
+    "reactjs": "react",
+    "vue": "vuejs",
+    "angularjs": "angular",
+    "expressjs": "express",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "dotnet": "net",
+    "aspnet": "net",
+    "rails": "rubyonrails",
+    "ror": "rubyonrails",
+    "ml": "machinelearning",
+    "tf": "tensorflow",
+    "springframework": "springboot",
+    "amazonwebservices": "aws",
+    "googlecloud": "gcp",
+    "googlecloudplatform": "gcp",
+    "msazure": "azure",
+    "microsoftazure": "azure",
+    "iphone": "ios",
+}
+
+# Spaces, dots, hyphens, underscores and slashes; '+' and '#' still tell C, C++ and C# apart
+_SEPARATORS = re.compile(r"[\s._/\-]+")
+
+
+def skill_key(skill):
+    """Compact, alias-resolved key: 'Node.js', 'node js' and 'NodeJS' all become 'nodejs'"""
+    key = _SEPARATORS.sub("", str(skill).lower())
+    return SKILL_ALIASES.get(key, key)
+
+
+def split_techstack(techstack):
+    return [part.strip() for part in str(techstack).split(",") if part.strip()]
+
+
+class LexicalIndex:
+    """Inverted index from tech-stack skill keys to portfolio rows.
+
+    Exact and alias matches are answered from here without embedding anything; only
+    skills with no lexical match need the vector search.
+    """
+
+    def __init__(self, scan_limit=None):
+        # Each posting is a dict used as an insertion-ordered set of row ids
+        self.postings = {}
+        self.links = {}
+        # Rows ranked per skill on a lookup, so a skill shared by most rows stays cheap to match
+        self.scan_limit = scan_limit or int(os.getenv("LEXICAL_SCAN_LIMIT", "256"))
+        self._lock = threading.Lock()
+
+    def add(self, row_id, techstack, links):
+        with self._lock:
+            self.links[row_id] = links
+            for part in split_techstack(techstack):
+                self.postings.setdefault(skill_key(part), {})[row_id] = None
+
+    def clear(self):
+        with self._lock:
+            self.postings.clear()
+            self.links.clear()
+
+    def __len__(self):
+        return len(self.links)
+
+    def match(self, skills, per_skill=2):
+        """Rank rows for one job's skills.
+
+        Rows matching more of the job's skills rank first; each skill contributes at most
+        per_skill rows, chosen from the first scan_limit rows of its posting.
+        Returns (ranked [{"links": url}] list, skills with no match).
+        """
+        keys = {}
+        for skill in skills:
+            keys.setdefault(skill_key(skill), skill)
+        with self._lock:
+            matched = {key: list(islice(self.postings[key], self.scan_limit)) for key in keys if key in self.postings}
+            scores = {}
+            for rows in matched.values():
+                for row_id in rows:
+                    scores[row_id] = scores.get(row_id, 0) + 1
+
+            selected = {}
+            for rows in matched.values():
+                for row_id in heapq.nsmallest(per_skill, rows, key=lambda row_id: -scores[row_id]):
+                    selected.setdefault(row_id, len(selected))
+
+            ranked = sorted(selected, key=lambda row_id: (-scores[row_id], selected[row_id]))
+            unmatched = [skill for key, skill in keys.items() if key not in matched]
+            return [{"links": self.links[row_id]} for row_id in ranked], unmatched
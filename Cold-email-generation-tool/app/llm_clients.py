@@ -0,0 +1,74 @@
+import os
+import threading
+import httpx
+from groq import DefaultHttpxClient
+from langchain_groq import ChatGroq
+
+
+class LLMClientRegistry:
+    """Process-wide ChatGroq clients, one per model and parameter set.
+
+    Every Chain asks here instead of constructing its own client, so a new session or
+    a settings change reuses warm keep-alive connections. All clients send through
+    one HTTP connection pool, which caps the connections open to the provider.
+    """
+
+    def __init__(self, max_connections=None, max_keepalive=None):
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+        self.max_keepalive = max_keepalive or int(os.getenv("LLM_MAX_KEEPALIVE", str(self.max_connections)))
+        self.created = 0
+        self.reused = 0
+        self._clients = {}
+        self._http_client = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name, api_key, params):
+        return (model_name, api_key, tuple(sorted((name, repr(value)) for name, value in params.items())))
+
+    def _shared_http_client(self):
+        if self._http_client is None:
+            self._http_client = DefaultHttpxClient(limits=httpx.Limits(
+                max_connections=self.max_connections, max_keepalive_connections=self.max_keepalive))
+        return self._http_client
+
+    def get(self, model_name, **params):
+        """Return the shared client for model_name and params, creating it on first use"""
+        api_key = params.pop("groq_api_key", None) or os.getenv("GROQ_API_KEY")
+        key = self.make_key(model_name, api_key, params)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.reused += 1
+                return client
+            client = ChatGroq(model_name=model_name, groq_api_key=api_key,
+                              http_client=self._shared_http_client(), **params)
+            self._clients[key] = client
+            self.created += 1
+            return client
+
+    def close(self):
+        """Drop every client and close the shared connections"""
+        with self._lock:
+            self._clients.clear()
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    def stats(self):
+        with self._lock:
+            return {"clients": len(self._clients), "created": self.created, "reused": self.reused,
+                    "max_connections": self.max_connections}
+
+
+_registry_lock = threading.Lock()
+_registry = None
+
+
+def get_llm_clients():
+    """Return the process-wide LLM client registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
@@ -1,12 +1,19 @@
 import streamlit as st
-from langchain_community.document_loaders import WebBaseLoader
-from chains import Chain
-from portfolio import Portfolio
 from utils import clean_text
+from embedding_cache import get_embedding_cache
+# chains, portfolio and page_cache are imported on first use, see get_chain and home_page
+from startup import import_profile, lazy_import, mark_first_paint, prewarm
+from generation import get_generation_manager
+from email_store import SessionEmailStore
+from draft_store import get_draft_store
+from model_router import get_model_router
 import time
 from datetime import datetime
+import math
 import json
 import os
+import html
+import tempfile
 
 # Configure the page with a professional theme
 st.set_page_config(
@@ -424,7 +431,7 @@ def inject_custom_css():
 
 
 def create_navigation_bar():
-    """Create a custom navigation bar with Home and Settings buttons"""
+    """Create a custom navigation bar with Home, Drafts and Settings buttons"""
     current_page = st.session_state.get('page', 'home')
 
     col1, col2, col3 = st.columns([2, 1, 2])
@@ -438,12 +445,17 @@ def create_navigation_bar():
         """, unsafe_allow_html=True)
 
     with col3:
-        nav_col1, nav_col2 = st.columns(2)
+        nav_col1, nav_col2, nav_col3 = st.columns(3)
         with nav_col1:
             if st.button("🏠 Home", use_container_width=True, type="primary" if current_page == 'home' else "secondary"):
                 st.session_state.page = 'home'
                 st.rerun()
         with nav_col2:
+            if st.button("📝 Drafts", use_container_width=True,
+                         type="primary" if current_page == 'drafts' else "secondary"):
+                st.session_state.page = 'drafts'
+                st.rerun()
+        with nav_col3:
             if st.button("⚙️ Settings", use_container_width=True,
                          type="primary" if current_page == 'settings' else "secondary"):
                 st.session_state.page = 'settings'
@@ -505,7 +517,173 @@ def show_loading_animation():
     return placeholder
 
 
-def home_page(llm, portfolio, clean_text):
+def render_job_details(idx, job):
+    """Render the extracted job fields for one position"""
+    with st.expander(f"📋 **Extracted Job Details - Position {idx + 1}**", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**🏢 Company:** {job.get('company', 'N/A')}")
+            st.markdown(f"**💼 Role:** {job.get('role', 'N/A')}")
+        with col2:
+            st.markdown(f"**📍 Location:** {job.get('location', 'N/A')}")
+            st.markdown(f"**🎯 Experience:** {job.get('experience', 'N/A')}")
+
+        if job.get('skills'):
+            st.markdown("**🛠️ Required Skills:**")
+            skills_cols = st.columns(4)
+            for skill_idx, skill in enumerate(job.get('skills', [])):
+                with skills_cols[skill_idx % 4]:
+                    st.markdown(f"• {skill}")
+
+
+def render_job_result(idx, job, job_key, email, generation_id=None, version=0, url=None):
+    """Render one position's job details, generated email and action buttons"""
+    render_job_details(idx, job)
+
+    # Display generated email
+    st.markdown(f"### 📧 Your Personalized Cold Email - Position {idx + 1}")
+
+    # Create a unique key for this email's text area; a regenerated email gets a fresh editor
+    email_key = f"email_text_{job_key}_{version}"
+    edited_email = st.text_area(
+        "Edit your email:",
+        value=email,
+        height=400,
+        key=email_key,
+        label_visibility="collapsed"
+    )
+
+    # Action buttons with unique keys
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button(f"📋 Copy to Clipboard", use_container_width=True, key=f"copy_{idx}"):
+            # Using pyperclip alternative for Streamlit
+            st.code(edited_email, language='text')
+            st.success("Email displayed above - select and copy!")
+    with col2:
+        if st.button(f"🔄 Regenerate", use_container_width=True, key=f"regen_{idx}"):
+            # Rewrite just this email in the background, skipping the shared response cache
+            if get_generation_manager().regenerate(generation_id, idx):
+                st.rerun()
+            st.warning("This generation has expired - click Generate to start a new one.")
+    with col3:
+        if st.button(f"💾 Save Draft", use_container_width=True, key=f"save_{idx}"):
+            # Append to the searchable draft store with the job it was written for
+            draft_id = get_draft_store().save(url or job_key.rpartition("_")[0], job, edited_email,
+                                              get_chain().config_hash())
+            st.success(f"Draft #{draft_id} saved - find it under 📝 Drafts")
+
+    st.markdown("---")
+
+
+def render_trace_waterfall(trace):
+    """Show where a generation's time went, one bar per pipeline stage"""
+    total_ms = trace["duration_ms"] or 1
+    with st.expander(f"⏱️ Generation Timing - {total_ms / 1000:.2f}s total", expanded=False):
+        rows = []
+        for item in trace["spans"]:
+            left = min(100.0, item["start_ms"] / total_ms * 100)
+            width = max(0.5, min(100.0 - left, item["duration_ms"] / total_ms * 100))
+            details = html.escape(", ".join(f"{key}={value}" for key, value in item["attrs"].items() if key != "url"))
+            rows.append(f"""
+            <div style="display: flex; align-items: center; gap: 10px; font-size: 0.85rem; margin: 2px 0;">
+                <div style="width: 140px; font-weight: 600;">{item["name"]}</div>
+                <div style="flex: 1; background: #f3f4f6; border-radius: 4px; height: 14px; position: relative;">
+                    <div style="position: absolute; left: {left:.2f}%; width: {width:.2f}%; height: 100%;
+                                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 4px;"></div>
+                </div>
+                <div style="width: 80px; text-align: right;">{item["duration_ms"]:.0f} ms</div>
+            </div>
+            <div style="margin-left: 150px; color: #6b7280; font-size: 0.75rem;">{details}</div>
+            """)
+        st.markdown("".join(rows), unsafe_allow_html=True)
+        st.caption(f"Trace {trace['trace_id']} exported to the local trace log")
+
+
+GENERATION_STATUS = {
+    "queued": "⏳ Waiting for a free worker...",
+    "fetching": "📥 Fetching the job page...",
+    "extracting": "🔍 Reading the job postings...",
+    "matching": "🔗 Matching your portfolio...",
+    "writing": "✍️ Writing your emails...",
+}
+
+
+def render_generation_progress(snapshot):
+    """Read-only view of a generation that is still running"""
+    show_loading_animation()
+    status = GENERATION_STATUS.get(snapshot["status"], "✍️ Writing your emails...")
+    if snapshot["jobs"]:
+        status += f" Found {len(snapshot['jobs'])} job posting(s) so far."
+    st.markdown(status)
+    for idx, job in enumerate(snapshot["jobs"]):
+        if idx in snapshot["partial"]:
+            st.markdown(f"### ✍️ Writing Email - Position {idx + 1}\n\n{snapshot['partial'][idx]}▌")
+        elif idx in snapshot["emails"]:
+            st.markdown(f"✅ Position {idx + 1}: {job.get('role', 'N/A')} - email ready")
+
+
+def render_generation(generation):
+    """Follow a background generation until it settles, then render its results.
+
+    Any interaction reruns the script and stops this loop, but not the generation:
+    the next run attaches to the same job and picks up where the page left off.
+    """
+    live = st.empty()
+    snapshot = generation.snapshot()
+    while not snapshot["finished"] or snapshot["writing"]:
+        with live.container():
+            render_generation_progress(snapshot)
+        time.sleep(0.3)
+        snapshot = generation.snapshot()
+    live.empty()
+
+    if snapshot["notice"]:
+        st.info(f"ℹ️ {snapshot['notice']}")
+    if snapshot["status"] == "failed":
+        st.error(f"⚠️ An Error Occurred: {snapshot['error']}")
+        st.markdown("Please check the URL and try again.")
+    else:
+        # Success message
+        st.markdown("""
+        <div class="success-message">
+            ✅ Email Generated Successfully! Your personalized cold email is ready.
+        </div>
+        """, unsafe_allow_html=True)
+
+        # Store generated emails in session state to avoid regeneration
+        generated_emails = get_email_store()
+        for idx, job in enumerate(snapshot["jobs"]):
+            job_key = f"{snapshot['url']}_{idx}"
+            if idx in snapshot["emails"]:
+                generated_emails[job_key] = snapshot["emails"][idx]
+                render_job_result(idx, job, job_key, snapshot["emails"][idx],
+                                  generation.id, snapshot["email_versions"].get(idx, 0), snapshot["url"])
+            else:
+                render_job_details(idx, job)
+                error = snapshot["email_errors"].get(idx, "no email was produced")
+                st.error(f"⚠️ Could not generate the email for position {idx + 1}: {error}")
+                st.markdown("---")
+
+    if snapshot["trace"] is not None:
+        render_trace_waterfall(snapshot["trace"])
+
+
+def get_email_store():
+    """The session's generated emails; only the most recent ones are held in memory"""
+    if 'generated_emails' not in st.session_state:
+        st.session_state.generated_emails = SessionEmailStore()
+    return st.session_state.generated_emails
+
+
+def get_chain():
+    """Create the session's chain on first use with the saved user configuration"""
+    if 'chain' not in st.session_state:
+        st.session_state.chain = lazy_import("chains").Chain(st.session_state.user_config)
+    return st.session_state.chain
+
+
+def home_page(clean_text):
     # Hero Section
     create_hero_section()
 
@@ -529,128 +707,32 @@ def home_page(llm, portfolio, clean_text):
 
     st.markdown('</div>', unsafe_allow_html=True)
 
+    manager = get_generation_manager()
     if submit_button:
         if url_input:
-            # Show loading animation
-            loading_placeholder = show_loading_animation()
-
-            try:
-                # Clear any previous results from session state
-                if 'last_url' in st.session_state and st.session_state.last_url == url_input:
-                    # Same URL, clear previous results to avoid duplication
-                    if 'generated_emails' in st.session_state:
-                        del st.session_state.generated_emails
-
-                st.session_state.last_url = url_input
-
-                # Load and process the URL
-                loader = WebBaseLoader([url_input])
-                data = clean_text(loader.load().pop().page_content)
-
-                # Try to load portfolio but continue even if it fails
-                portfolio_loaded = False
-                try:
-                    portfolio_loaded = portfolio.load_portfolio()
-                except Exception as e:
-                    st.info("ℹ️ No portfolio file found. Generating email without portfolio links.")
-
-                jobs = llm.extract_jobs(data)
-
-                # Clear loading animation
-                loading_placeholder.empty()
-
-                # Success message
-                st.markdown("""
-                <div class="success-message">
-                    ✅ Email Generated Successfully! Your personalized cold email is ready.
-                </div>
-                """, unsafe_allow_html=True)
-
-                # Store generated emails in session state to avoid regeneration
-                if 'generated_emails' not in st.session_state:
-                    st.session_state.generated_emails = {}
-
-                for idx, job in enumerate(jobs):
-                    job_key = f"{url_input}_{idx}"
-
-                    # Job details section
-                    with st.expander(f"📋 **Extracted Job Details - Position {idx + 1}**", expanded=True):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.markdown(f"**🏢 Company:** {job.get('company', 'N/A')}")
-                            st.markdown(f"**💼 Role:** {job.get('role', 'N/A')}")
-                        with col2:
-                            st.markdown(f"**📍 Location:** {job.get('location', 'N/A')}")
-                            st.markdown(f"**🎯 Experience:** {job.get('experience', 'N/A')}")
-
-                        if job.get('skills'):
-                            st.markdown("**🛠️ Required Skills:**")
-                            skills_cols = st.columns(4)
-                            for skill_idx, skill in enumerate(job.get('skills', [])):
-                                with skills_cols[skill_idx % 4]:
-                                    st.markdown(f"• {skill}")
-
-                    # Generate email only if not already generated for this job
-                    if job_key not in st.session_state.generated_emails:
-                        skills = job.get('skills', [])
-
-                        # Query portfolio links
-                        links = []
-                        if portfolio_loaded:
-                            try:
-                                links = portfolio.query_links(skills)
-                            except:
-                                links = []
-
-                        email = llm.write_mail(job, links)
-                        st.session_state.generated_emails[job_key] = email
-                    else:
-                        email = st.session_state.generated_emails[job_key]
-
-                    # Display generated email
-                    st.markdown(f"### 📧 Your Personalized Cold Email - Position {idx + 1}")
-
-                    # Create a unique key for this email's text area
-                    email_key = f"email_text_{job_key}"
-                    edited_email = st.text_area(
-                        "Edit your email:",
-                        value=email,
-                        height=400,
-                        key=email_key,
-                        label_visibility="collapsed"
-                    )
-
-                    # Action buttons with unique keys
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        if st.button(f"📋 Copy to Clipboard", use_container_width=True, key=f"copy_{idx}"):
-                            # Using pyperclip alternative for Streamlit
-                            st.code(edited_email, language='text')
-                            st.success("Email displayed above - select and copy!")
-                    with col2:
-                        if st.button(f"🔄 Regenerate", use_container_width=True, key=f"regen_{idx}"):
-                            # Clear this specific email from cache
-                            if job_key in st.session_state.generated_emails:
-                                del st.session_state.generated_emails[job_key]
-                            st.rerun()
-                    with col3:
-                        if st.button(f"💾 Save Draft", use_container_width=True, key=f"save_{idx}"):
-                            # Save to file
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            filename = f"email_draft_{timestamp}.txt"
-                            with open(filename, 'w') as f:
-                                f.write(edited_email)
-                            st.success(f"Draft saved as {filename}")
-
-                    st.markdown("---")
-
-            except Exception as e:
-                loading_placeholder.empty()
-                st.error(f"⚠️ An Error Occurred: {str(e)}")
-                st.markdown("Please check the URL and try again.")
+            # Clear any previous results from session state
+            if 'last_url' in st.session_state and st.session_state.last_url == url_input:
+                # Same URL, clear previous results to avoid duplication
+                get_email_store().clear()
+
+            st.session_state.last_url = url_input
+
+            # Emails this session already has for the URL are kept instead of rewritten
+            known_emails = get_email_store().for_url(url_input)
+
+            # The work runs on the background pool; this and later reruns only follow it by id
+            st.session_state.generation_id = manager.submit(url_input, get_chain(), clean_text, known_emails,
+                                                            owner=get_email_store().session_id)
         else:
             st.warning("Please enter a valid job posting URL")
 
+    generation = manager.get(st.session_state.get('generation_id'))
+    if generation is not None:
+        render_generation(generation)
+    elif st.session_state.get('generation_id') is not None:
+        # Forgotten only after sitting unviewed for GENERATION_IDLE_TTL seconds
+        st.info("These results have expired. Click Generate to run this job posting again.")
+
     # Features Section
     st.markdown("---")
     st.markdown("## 🌟 Why Choose Our Cold Email Generator?")
@@ -666,6 +748,73 @@ def home_page(llm, portfolio, clean_text):
     """, unsafe_allow_html=True)
 
 
+DRAFTS_PER_PAGE = 10
+
+
+def drafts_page():
+    st.markdown("## 📝 Saved Drafts")
+    st.markdown("Search the emails you saved by their text, company, role, skills or URL")
+
+    store = get_draft_store()
+    query = st.text_input("Search drafts:", placeholder="e.g. python remote", key="draft_query")
+    if st.session_state.get('draft_query_seen') != query:
+        # A new search starts from its first page
+        st.session_state.draft_query_seen = query
+        st.session_state.draft_page = 0
+
+    total = store.count(query)
+    pages = max(1, math.ceil(total / DRAFTS_PER_PAGE))
+    page = min(st.session_state.get('draft_page', 0), pages - 1)
+    st.caption(f"{total} draft{'s' if total != 1 else ''} found")
+
+    for draft in store.search(query, limit=DRAFTS_PER_PAGE, offset=page * DRAFTS_PER_PAGE):
+        saved_at = datetime.fromtimestamp(draft["created_at"]).strftime("%Y-%m-%d %H:%M")
+        title = " at ".join(part for part in (draft["role"], draft["company"]) if part) or draft["url"]
+        with st.expander(f"#{draft['id']} · {title} · {saved_at}"):
+            st.markdown(f"**🔗 URL:** {draft['url']}")
+            if draft["skills"]:
+                st.markdown(f"**🛠️ Skills:** {draft['skills']}")
+            st.code(draft["email"], language='text')
+            if st.button("🗑️ Delete", key=f"delete_draft_{draft['id']}"):
+                store.delete(draft["id"])
+                st.rerun()
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Newer", use_container_width=True, disabled=page == 0, key="drafts_prev"):
+            st.session_state.draft_page = page - 1
+            st.rerun()
+    with col2:
+        st.markdown(f"<div style='text-align: center;'>Page {page + 1} of {pages}</div>", unsafe_allow_html=True)
+    with col3:
+        if st.button("Older ➡️", use_container_width=True, disabled=page >= pages - 1, key="drafts_next"):
+            st.session_state.draft_page = page + 1
+            st.rerun()
+
+    if total:
+        st.markdown("---")
+        st.markdown("### 📦 Export")
+        export_format = st.radio("Format:", ["jsonl", "csv"], horizontal=True, key="draft_export_format")
+        # Streamed into a temporary file on request; the session only keeps its path
+        if st.button("Prepare Export", key="draft_export_btn"):
+            previous = st.session_state.get('draft_export')
+            if previous is not None and os.path.exists(previous[2]):
+                os.remove(previous[2])
+            fd, export_path = tempfile.mkstemp(prefix="email_drafts_", suffix=f".{export_format}")
+            os.close(fd)
+            store.export_to_file(export_path, export_format, query)
+            st.session_state.draft_export = (export_format, query, export_path)
+        draft_export = st.session_state.get('draft_export')
+        if draft_export is not None and draft_export[:2] == (export_format, query) and os.path.exists(draft_export[2]):
+            with open(draft_export[2], "rb") as f:
+                st.download_button(
+                    label=f"Download {export_format.upper()}",
+                    data=f,
+                    file_name=f"email_drafts.{export_format}",
+                    mime="text/csv" if export_format == "csv" else "application/jsonl"
+                )
+
+
 def settings_page():
     st.markdown("## ⚙️ Professional Configuration")
     st.markdown("Configure your personal and professional details for personalized email generation")
@@ -982,7 +1131,7 @@ def init_session_state():
     # Set page from query params or default to 'home'
     if 'page' not in st.session_state:
         page_from_url = query_params.get('page', 'home')
-        st.session_state.page = page_from_url if page_from_url in ['home', 'settings'] else 'home'
+        st.session_state.page = page_from_url if page_from_url in ['home', 'drafts', 'settings'] else 'home'
 
     # Update query params to reflect current page
     st.query_params['page'] = st.session_state.page
@@ -1018,6 +1167,13 @@ if __name__ == "__main__":
             st.query_params['page'] = 'home'
             st.rerun()
 
+        if st.button("📝 Drafts", use_container_width=True,
+                     type="primary" if st.session_state.page == 'drafts' else "secondary",
+                     key="sidebar_drafts"):
+            st.session_state.page = 'drafts'
+            st.query_params['page'] = 'drafts'
+            st.rerun()
+
         if st.button("⚙️ Settings", use_container_width=True,
                      type="primary" if st.session_state.page == 'settings' else "secondary",
                      key="sidebar_settings"):
@@ -1033,9 +1189,12 @@ if __name__ == "__main__":
         if uploaded_file is not None:
             # Create directory if it doesn't exist
             os.makedirs("app/resource", exist_ok=True)
-            # Save the uploaded file
-            with open("app/resource/my_portfolio.csv", "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Save each upload once; reruns while it sits in the uploader neither copy nor reload it
+            upload_id = (uploaded_file.file_id, uploaded_file.size)
+            if st.session_state.get('saved_portfolio_upload') != upload_id:
+                with open("app/resource/my_portfolio.csv", "wb") as f:
+                    f.write(uploaded_file.getbuffer())
+                st.session_state.saved_portfolio_upload = upload_id
             st.success("Portfolio uploaded successfully!")
 
         # Show current user if configured
@@ -1067,9 +1226,55 @@ if __name__ == "__main__":
             st.metric("Portfolio Items",
                       "Active" if os.path.exists("app/resource/my_portfolio.csv") else "None")
 
+        if 'chain' in st.session_state:
+            cache_stats = st.session_state.chain.cache.stats()
+            st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                       f"({cache_stats['entries']} stored)")
+            prompt_stats = st.session_state.chain.prompt_stats
+            if prompt_stats['calls']:
+                st.caption(f"Email prompts: {prompt_stats['prompt_tokens'] // prompt_stats['calls']} tokens avg, "
+                           f"{prompt_stats['tokens_saved']} tokens saved")
+            duplicate_stats = st.session_state.chain.duplicates.stats()
+            if duplicate_stats['hits']:
+                st.caption(f"Near-duplicates: {duplicate_stats['hits']} results reused "
+                           f"({duplicate_stats['entries']} fingerprints)")
+
+        model_stats = [row for row in get_model_router().stats() if row['total_calls']]
+        if model_stats:
+            with st.expander("📈 Model Latency", expanded=False):
+                st.dataframe([
+                    {"Model": row['model'], "Stages": row['stages'], "Calls": row['recent_calls'],
+                     "p50 (s)": round(row['p50_s'], 2) if row['p50_s'] is not None else None,
+                     "p95 (s)": round(row['p95_s'], 2) if row['p95_s'] is not None else None,
+                     "Errors": f"{row['error_rate']:.0%}",
+                     "Status": "⚠️ fallback" if row['degraded'] else "✅ healthy"}
+                    for row in model_stats
+                ], hide_index=True, use_container_width=True)
+                st.caption(f"Recent calls per model; degraded models are tried last. "
+                           f"{get_model_router().fallbacks} calls fell back to another model.")
+
+        email_store = st.session_state.get('generated_emails')
+        if email_store is not None and len(email_store) > email_store.memory_size():
+            st.caption(f"Session emails: {email_store.memory_size()} in memory, "
+                       f"{len(email_store) - email_store.memory_size()} on disk")
+
+        embedding_stats = get_embedding_cache().stats()
+        if embedding_stats['memory_hits'] + embedding_stats['disk_hits'] + embedding_stats['misses']:
+            st.caption(f"Skill embeddings: {embedding_stats['hit_rate']:.0%} cached, "
+                       f"{embedding_stats['avg_embed_ms']:.0f} ms per embed call")
+
+        startup_profile = import_profile()
+        if startup_profile['first_paint_ms'] is not None:
+            imports = ", ".join(f"{name} {info['ms']:.0f} ms"
+                                for name, info in startup_profile['imports'].items())
+            st.caption(f"Cold start: first page in {startup_profile['first_paint_ms']:.0f} ms"
+                       + (f"; imports: {imports}" if imports else ""))
+
     # Main content area - Display appropriate page based on state
     if st.session_state.page == 'settings':
         settings_page()
+    elif st.session_state.page == 'drafts':
+        drafts_page()
     else:  # home page
         # Check if configuration exists
         if not st.session_state.user_config:
@@ -1081,10 +1286,8 @@ if __name__ == "__main__":
                     st.query_params['page'] = 'settings'
                     st.rerun()
         else:
-            # Create chain with user config, cache it in session state
-            if 'chain' not in st.session_state:
-                st.session_state.chain = Chain(st.session_state.user_config)
+            home_page(clean_text)
 
-            chain = st.session_state.chain
-            portfolio = Portfolio()
-            home_page(chain, portfolio, clean_text)
\ No newline at end of file
+    # The page is on screen; load the heavy modules before the user first needs them
+    mark_first_paint()
+    prewarm()
\ No newline at end of file
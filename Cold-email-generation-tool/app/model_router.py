@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from collections import deque
+
+# Extraction is structured output a small model handles well; emails get the large one
+DEFAULT_ROUTES = {
+    "extract": "llama-3.1-8b-instant,llama-3.3-70b-versatile",
+    "email": "llama-3.3-70b-versatile,llama-3.1-8b-instant",
+}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class ModelHealth:
+    """Latency and outcome of a model's recent calls, kept for a sliding time window"""
+
+    def __init__(self, window_seconds, max_samples):
+        self.window_seconds = window_seconds
+        self.samples = deque(maxlen=max_samples)
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, seconds, ok):
+        self.samples.append((time.monotonic(), seconds, ok))
+        self.calls += 1
+        self.errors += int(not ok)
+
+    def recent(self):
+        cutoff = time.monotonic() - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+
+class ModelRouter:
+    """Chooses the model for each pipeline stage from a configured fallback list.
+
+    Every call reports its latency and outcome here. A model whose recent p95 latency
+    or error rate crosses the thresholds is moved behind the healthy ones until its
+    samples age out of the window, and a failed call falls through to the next model.
+    """
+
+    def __init__(self, routes=None, max_p95=None, max_error_rate=None, min_calls=None, window_seconds=None):
+        self.routes = routes or {
+            stage: [model.strip() for model in os.getenv(f"{stage.upper()}_MODELS", default).split(",")
+                    if model.strip()]
+            for stage, default in DEFAULT_ROUTES.items()
+        }
+        self.max_p95 = max_p95 or float(os.getenv("MODEL_MAX_P95_SECONDS", "20"))
+        self.max_error_rate = max_error_rate or float(os.getenv("MODEL_MAX_ERROR_RATE", "0.3"))
+        # Too few samples say nothing about a model; it keeps its place until there are enough
+        self.min_calls = min_calls or int(os.getenv("MODEL_HEALTH_MIN_CALLS", "5"))
+        self.window_seconds = window_seconds or float(os.getenv("MODEL_HEALTH_WINDOW", "300"))
+        self.fallbacks = 0
+        self._health = {}
+        self._lock = threading.Lock()
+
+    def _model_health(self, model):
+        if model not in self._health:
+            self._health[model] = ModelHealth(self.window_seconds, max_samples=200)
+        return self._health[model]
+
+    def route(self, stage):
+        """The configured models for stage, primary first"""
+        return list(self.routes.get(stage) or self.routes["email"])
+
+    def _degraded(self, samples):
+        if len(samples) < self.min_calls:
+            return False
+        error_rate = sum(1 for _, _, ok in samples if not ok) / len(samples)
+        p95 = percentile([seconds for _, seconds, ok in samples if ok], 95)
+        return error_rate > self.max_error_rate or (p95 is not None and p95 > self.max_p95)
+
+    def candidates(self, stage):
+        """Models to try for stage, in order: healthy ones first, degraded ones as a last resort"""
+        with self._lock:
+            models = self.route(stage)
+            degraded = {model for model in models if self._degraded(self._model_health(model).recent())}
+        return [model for model in models if model not in degraded] + [model for model in models if model in degraded]
+
+    def record(self, model, seconds, ok=True):
+        with self._lock:
+            self._model_health(model).record(seconds, ok)
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def timed(self, model, fn):
+        """Run fn() and record its latency, or its failure, against model"""
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception:
+            self.record(model, time.monotonic() - started, ok=False)
+            raise
+        self.record(model, time.monotonic() - started)
+        return result
+
+    def timed_stream(self, model, chunks):
+        """Pass chunks through, recording the latency of the whole stream against model"""
+        started = time.monotonic()
+        try:
+            for chunk in chunks:
+                yield chunk
+        except GeneratorExit:
+            # The reader stopped early; that says nothing about the model
+            raise
+        except Exception:
+            self.record(model, time.monotonic() - started, ok=False)
+            raise
+        self.record(model, time.monotonic() - started)
+
+    def stats(self):
+        """Per-model health over the window, as rows for the latency dashboard"""
+        with self._lock:
+            models = list(dict.fromkeys(model for route in self.routes.values() for model in route))
+            models += [model for model in self._health if model not in models]
+            rows = []
+            for model in models:
+                health = self._model_health(model)
+                samples = health.recent()
+                latencies = [seconds for _, seconds, ok in samples if ok]
+                rows.append({
+                    "model": model,
+                    "stages": ", ".join(stage for stage, route in self.routes.items() if model in route),
+                    "recent_calls": len(samples),
+                    "p50_s": percentile(latencies, 50),
+                    "p95_s": percentile(latencies, 95),
+                    "error_rate": sum(1 for _, _, ok in samples if not ok) / len(samples) if samples else 0.0,
+                    "total_calls": health.calls,
+                    "degraded": self._degraded(samples),
+                })
+            return rows
+
+
+_router_lock = threading.Lock()
+_router = None
+
+
+def get_model_router():
+    """Return the process-wide model router; model health is shared by all sessions"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
@@ -0,0 +1,202 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+import aiohttp
+from bs4 import BeautifulSoup
+from fetcher import HTTPStatusError, get_fetcher
+from tracing import current_trace, span
+
+
+class PageCache:
+    """On-disk cache of scraped job pages keyed by URL.
+
+    Pages younger than freshness seconds are served without touching the network;
+    older ones are revalidated with ETag/Last-Modified. Once the stored text exceeds
+    max_bytes the least recently used pages are evicted.
+    """
+
+    def __init__(self, path=None, freshness=None, max_bytes=None):
+        self.path = path or os.getenv("PAGE_CACHE_PATH", "cache/page_cache.sqlite3")
+        self.freshness = freshness if freshness is not None else int(os.getenv("PAGE_CACHE_FRESHNESS", "3600"))
+        self.max_bytes = max_bytes or int(os.getenv("PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                raw_text TEXT NOT NULL,
+                cleaned_text TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)")
+        self._conn.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw_text, cleaned_text, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return {"raw_text": row[0], "cleaned_text": row[1], "etag": row[2],
+                "last_modified": row[3], "fetched_at": row[4]}
+
+    def is_fresh(self, page):
+        return time.time() - page["fetched_at"] <= self.freshness
+
+    def put(self, url, raw_text, cleaned_text, etag=None, last_modified=None):
+        now = time.time()
+        size = len(raw_text.encode("utf-8")) + len(cleaned_text.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, raw_text, cleaned_text, etag, last_modified, size, now, now))
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url, revalidated=False):
+        """Record a read, and reset the freshness window after a 304"""
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                                   (now, now, url))
+            else:
+                self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            pages, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                "pages": pages, "bytes": size}
+
+
+_page_cache_lock = threading.Lock()
+_page_cache = None
+
+
+def get_page_cache():
+    """Return the process-wide page cache"""
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache()
+        return _page_cache
+
+
+def _extract_text(html, clean_text, trace=None):
+    with span("parse_html", trace, input_chars=len(html)) as attrs:
+        raw_text = BeautifulSoup(html, "html.parser").get_text()
+        attrs["output_chars"] = len(raw_text)
+    with span("clean_text", trace, input_chars=len(raw_text)) as attrs:
+        cleaned_text = clean_text(raw_text)
+        attrs["output_chars"] = len(cleaned_text)
+    return raw_text, cleaned_text
+
+
+async def aload_page(url, clean_text, cache=None, force=False, raise_for_status=False, fetcher=None,
+                     trace=None):
+    """Return the cleaned text of a job page, going through the page cache.
+
+    Mirrors WebBaseLoader: the page text is BeautifulSoup's get_text() of the HTML,
+    which is then passed through clean_text before being cached. Error pages are
+    never cached: a stale cached copy is served in their place when there is one,
+    and otherwise they raise when raise_for_status is set.
+    """
+    cache = cache or get_page_cache()
+    fetcher = fetcher or get_fetcher()
+    cached = None if force else cache.get(url)
+    if cached is not None and cache.is_fresh(cached):
+        cache.hits += 1
+        cache.touch(url)
+        with span("fetch", trace, url=url, cache="hit", output_chars=len(cached["cleaned_text"])):
+            return cached["cleaned_text"]
+
+    headers = {}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with span("fetch", trace, url=url) as fetch_attrs:
+        try:
+            response = await fetcher.fetch(url, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            # Serve the stale copy rather than failing when the site is unreachable
+            if cached is not None:
+                cache.hits += 1
+                fetch_attrs["cache"] = "stale"
+                return cached["cleaned_text"]
+            raise
+        fetch_attrs["status"] = response.status
+        fetch_attrs["output_chars"] = len(response.text)
+
+        if response.status == 304 and cached is not None:
+            cache.revalidated += 1
+            cache.touch(url, revalidated=True)
+            fetch_attrs["cache"] = "revalidated"
+            return cached["cleaned_text"]
+        if not response.ok and cached is not None:
+            # An error page is no better than the last good copy, so keep serving that
+            cache.hits += 1
+            fetch_attrs["cache"] = "stale"
+            return cached["cleaned_text"]
+        fetch_attrs["cache"] = "miss"
+
+    cache.misses += 1
+    if raise_for_status and not response.ok:
+        raise HTTPStatusError(url, response.status)
+    # Parsing and cleaning multi-megabyte pages would stall every other fetch on the loop
+    raw_text, cleaned_text = await asyncio.get_running_loop().run_in_executor(
+        None, _extract_text, response.text, clean_text, trace)
+    if response.ok:
+        cache.put(url, raw_text, cleaned_text,
+                  etag=response.headers.get("ETag"),
+                  last_modified=response.headers.get("Last-Modified"))
+    return cleaned_text
+
+
+def load_page(url, clean_text, cache=None, force=False, raise_for_status=False):
+    """Blocking wrapper around aload_page that runs on the shared fetcher loop"""
+    fetcher = get_fetcher()
+    # The fetcher loop runs in its own thread, so hand it the caller's trace explicitly
+    return fetcher.run(aload_page(url, clean_text, cache, force, raise_for_status, fetcher, current_trace()))
+
+
+def load_pages(urls, clean_text, cache=None, raise_for_status=False):
+    """Fetch several pages in parallel; failed URLs map to their exception"""
+    fetcher = get_fetcher()
+    trace = current_trace()
+
+    async def load_all():
+        return await asyncio.gather(
+            *(aload_page(url, clean_text, cache, False, raise_for_status, fetcher, trace) for url in urls),
+            return_exceptions=True)
+
+    return dict(zip(urls, fetcher.run(load_all())))
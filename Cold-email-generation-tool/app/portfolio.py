@@ -1,21 +1,228 @@
-import pandas as pd
+import os
+import csv
+import hashlib
+import threading
+import weakref
 import chromadb
-import uuid
+from chromadb.utils import embedding_functions
+from embedding_cache import get_embedding_cache
+from lexical_index import LexicalIndex
+from tracing import span
+
+REQUIRED_COLUMNS = ("Techstack", "Links")
+
+
+class PortfolioFormatError(ValueError):
+    pass
+
+
+def read_portfolio_rows(file_path, batch_size):
+    """Stream (techstack, links) pairs from the portfolio CSV in lists of batch_size.
+
+    Only one batch is held in memory. Rows with an empty Techstack or Links value are
+    skipped; a file without both columns raises PortfolioFormatError.
+    """
+    with open(file_path, "r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        columns = [column.strip() for column in reader.fieldnames or []]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise PortfolioFormatError(f"{file_path} is missing column(s): {', '.join(missing)}")
+        reader.fieldnames = columns
+
+        batch = []
+        for row in reader:
+            techstack = (row.get("Techstack") or "").strip()
+            links = (row.get("Links") or "").strip()
+            if not techstack or not links:
+                continue
+            batch.append((techstack, links))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
 
 class Portfolio:
-    def __init__(self, file_path="app/resource/my_portfolio.csv"):
+    def __init__(self, file_path="app/resource/my_portfolio.csv", store_path="vectorstore",
+                 batch_size=None, embedding_function=None):
         self.file_path = file_path
-        self.data = pd.read_csv(file_path)
-        self.chroma_client = chromadb.PersistentClient('vectorstore')
-        self.collection = self.chroma_client.get_or_create_collection(name="portfolio")
+        self.store_path = store_path
+        self.chroma_client = chromadb.PersistentClient(store_path)
+        self.embedding_function = embedding_function or embedding_functions.DefaultEmbeddingFunction()
+        self.collection = self.chroma_client.get_or_create_collection(
+            name="portfolio", embedding_function=self.embedding_function)
+        # Skill queries repeat constantly, so their vectors are cached per embedding model
+        self.embedding_cache = get_embedding_cache()
+        self.embedding_model = self._model_name(self.embedding_function)
+        # Exact and alias skill matches are answered in memory before any vector search
+        self.lexical_index = LexicalIndex()
+        self.lexical_match = os.getenv("PORTFOLIO_LEXICAL_MATCH", "1") != "0"
+        # Never exceed what the Chroma server accepts in a single call
+        self.batch_size = min(batch_size or int(os.getenv("PORTFOLIO_BATCH_SIZE", "1024")),
+                              self.chroma_client.get_max_batch_size())
+        self.last_ingest = {"rows": 0, "added": 0, "deleted": 0, "unchanged": 0}
+        self._lock = threading.Lock()
+        self._loaded = False
+        # What the sources looked like after this instance's own writes; anything else is an outside change
+        self.source_signature = _source_signature(file_path, store_path)
+        # Sessions may still be querying a replaced instance, so its client is closed only once none holds it
+        close = getattr(self.chroma_client, "close", None)
+        if close is not None:
+            weakref.finalize(self, close)
+
+    @staticmethod
+    def _model_name(embedding_function):
+        name = getattr(embedding_function, "name", None)
+        name = name() if callable(name) else type(embedding_function).__name__
+        model = getattr(embedding_function, "model_name", None)
+        return f"{name}:{model}" if model else name
+
+    def embed_queries(self, texts):
+        """Query vectors for texts, served from the embedding cache where possible"""
+        return self.embedding_cache.embed(texts, self.embedding_function, self.embedding_model)
+
+    @staticmethod
+    def row_id(techstack, links):
+        """Content-hash id, so unchanged rows keep their id across re-ingests"""
+        return hashlib.sha1(f"{techstack}\x1f{links}".encode("utf-8")).hexdigest()
 
     def load_portfolio(self):
-        if not self.collection.count():
-            for _, row in self.data.iterrows():
-                self.collection.add(documents=row["Techstack"],
-                                    metadatas={"links": row["Links"]},
-                                    ids=[str(uuid.uuid4())])
+        # Shared across sessions, so guard against two reruns ingesting at once
+        with self._lock, span("load_portfolio") as attrs:
+            attrs["cached"] = self._loaded
+            if not self._loaded:
+                self.last_ingest = self._sync_collection()
+                attrs.update(self.last_ingest)
+                self._loaded = True
+                self.source_signature = _source_signature(self.file_path, self.store_path)
+        return self._loaded
+
+    def changed_on_disk(self):
+        """Whether the CSV or store changed other than through this instance; never while it loads"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            return _source_signature(self.file_path, self.store_path) != self.source_signature
+        finally:
+            self._lock.release()
+
+    def _sync_collection(self):
+        """Upsert new or edited rows and delete rows removed from the CSV.
+
+        The CSV is streamed batch by batch; only row ids are kept for the whole file.
+        """
+        existing_ids = set(self.collection.get(include=[])["ids"])
+        seen_ids = set()
+        self.lexical_index.clear()
+        added = 0
+
+        for batch in read_portfolio_rows(self.file_path, self.batch_size):
+            new_rows = {}
+            for techstack, links in batch:
+                row_id = self.row_id(techstack, links)
+                # Repeated rows share an id; Chroma rejects duplicate ids within one upsert
+                if row_id in seen_ids:
+                    continue
+                seen_ids.add(row_id)
+                self.lexical_index.add(row_id, techstack, links)
+                if row_id not in existing_ids:
+                    new_rows[row_id] = (techstack, links)
+            if new_rows:
+                documents = [techstack for techstack, _ in new_rows.values()]
+                self.collection.upsert(ids=list(new_rows),
+                                       documents=documents,
+                                       embeddings=self.embedding_function(documents),
+                                       metadatas=[{"links": links} for _, links in new_rows.values()])
+                added += len(new_rows)
+
+        stale_ids = [row_id for row_id in existing_ids if row_id not in seen_ids]
+        for start in range(0, len(stale_ids), self.batch_size):
+            self.collection.delete(ids=stale_ids[start:start + self.batch_size])
+
+        return {"rows": len(seen_ids), "added": added, "deleted": len(stale_ids),
+                "unchanged": len(seen_ids) - added}
 
     def query_links(self, skills):
-        return self.collection.query(query_texts=skills, n_results=2).get('metadatas', [])
\ No newline at end of file
+        """Ranked link metadatas for one job's skills"""
+        return self.query_links_batch([skills])[0]
+
+    def query_links_batch(self, skill_lists, n_results=2):
+        """Match every job's skills, lexically first and by vector search for the rest.
+
+        Skills with an exact or alias match in the tech stacks are resolved from the
+        lexical index; the remaining ones share one embedding pass and one multi-query.
+        Returns one deduplicated list of link metadatas per entry in skill_lists, with
+        lexical matches ranked ahead of vector matches.
+        """
+        skill_lists = [[skills] if isinstance(skills, str) else [str(skill) for skill in skills or []]
+                       for skills in skill_lists]
+        unique_skills = list(dict.fromkeys(skill for skills in skill_lists for skill in skills))
+        if not unique_skills:
+            return [[] for _ in skill_lists]
+
+        with span("query_links", jobs=len(skill_lists), unique_skills=len(unique_skills)) as attrs:
+            if self.lexical_match and len(self.lexical_index):
+                lexical = [self.lexical_index.match(skills, n_results) for skills in skill_lists]
+            else:
+                lexical = [([], skills) for skills in skill_lists]
+            vector_skills = list(dict.fromkeys(skill for _, unmatched in lexical for skill in unmatched))
+            attrs["vector_skills"] = len(vector_skills)
+
+            matches = {}
+            if vector_skills:
+                misses_before = self.embedding_cache.misses
+                results = self.collection.query(query_embeddings=self.embed_queries(vector_skills),
+                                                n_results=n_results).get('metadatas', [])
+                attrs["embedded"] = self.embedding_cache.misses - misses_before
+                matches = dict(zip(vector_skills, results))
+
+        job_links = []
+        for ranked, unmatched in lexical:
+            seen = set()
+            links = []
+            candidates = ranked + [metadata for skill in unmatched for metadata in matches.get(skill) or []]
+            for metadata in candidates:
+                if metadata and metadata.get("links") not in seen:
+                    seen.add(metadata.get("links"))
+                    links.append(metadata)
+            job_links.append(links)
+        return job_links
+
+
+_portfolio_lock = threading.Lock()
+_portfolios = {}
+
+
+def _source_signature(file_path, store_path):
+    """Fingerprint the portfolio CSV and vector store so edits trigger a reload"""
+    def file_signature(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    # A rebuilt or replaced store shows up in Chroma's database file
+    return file_signature(file_path), file_signature(os.path.join(store_path, "chroma.sqlite3"))
+
+
+def get_portfolio(file_path="app/resource/my_portfolio.csv", store_path="vectorstore"):
+    """Return the process-wide Portfolio, rebuilding it only when its sources change"""
+    key = (os.path.abspath(file_path), os.path.abspath(store_path))
+    with _portfolio_lock:
+        portfolio = _portfolios.get(key)
+        if portfolio is not None and portfolio.changed_on_disk():
+            store_changed = _source_signature(file_path, store_path)[1] != portfolio.source_signature[1]
+            retired = weakref.ref(portfolio)
+            del _portfolios[key]
+            portfolio = None
+            # Chroma shares one open system per store path. A replaced store is only reopened
+            # once no session holds the old instance; until then they keep sharing it.
+            if store_changed and retired() is not None:
+                portfolio = _portfolios[key] = retired()
+        if portfolio is None:
+            portfolio = Portfolio(file_path, store_path)
+            _portfolios[key] = portfolio
+        return portfolio
@@ -0,0 +1,99 @@
+import os
+import json
+from utils import estimate_tokens
+
+JOB_FIELD_ORDER = ["role", "company", "location", "experience", "skills", "description"]
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_format_value(item) for item in value if item not in (None, ""))
+    if isinstance(value, dict):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return " ".join(str(value).split())
+
+
+def serialize_job(job, exclude=()):
+    """One 'Field: value' line per non-empty job field, in a stable order"""
+    if not isinstance(job, dict):
+        return _format_value(job)
+    fields = [field for field in JOB_FIELD_ORDER if field in job]
+    fields += [field for field in job if field not in JOB_FIELD_ORDER]
+    lines = []
+    for field in fields:
+        if field in exclude or job[field] is None:
+            continue
+        value = _format_value(job[field])
+        if value:
+            lines.append(f"{field.capitalize()}: {value}")
+    return "\n".join(lines)
+
+
+def flatten_links(links):
+    """Reduce Chroma metadatas (nested lists of {'links': url}) to unique URLs in order"""
+    urls = []
+
+    def collect(item):
+        if isinstance(item, dict):
+            collect(item.get("links"))
+        elif isinstance(item, (list, tuple)):
+            for sub_item in item:
+                collect(sub_item)
+        elif item:
+            urls.append(str(item))
+
+    collect(links)
+    return list(dict.fromkeys(urls))
+
+
+def _truncate(text, max_tokens):
+    max_chars = max(0, max_tokens * 4)
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars] + "..."
+
+
+class PromptBuilder:
+    """Serializes the variable parts of the email prompt within a token budget.
+
+    The description is trimmed first, then portfolio links, then the remaining job
+    fields, so the prompt stays bounded however long the posting is.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = budget or int(os.getenv("EMAIL_PROMPT_TOKEN_BUDGET", "1200"))
+
+    def build(self, job, links):
+        """Return (job_text, links_text, report) where report holds per-section token counts"""
+        job_text = serialize_job(job)
+        urls = flatten_links(links)
+        links_text = ", ".join(urls)
+        trimmed = False
+
+        if estimate_tokens(job_text) + estimate_tokens(links_text) > self.budget:
+            trimmed = True
+            head_text = serialize_job(job, exclude=("description",))
+            description = _format_value(job.get("description", "")) if isinstance(job, dict) else ""
+            room = self.budget - estimate_tokens(head_text) - estimate_tokens(links_text) - 2
+            if description and room > 0:
+                job_text = f"{head_text}\nDescription: {_truncate(description, room)}"
+            else:
+                job_text = head_text
+                while urls and estimate_tokens(job_text) + estimate_tokens(links_text) > self.budget:
+                    urls.pop()
+                    links_text = ", ".join(urls)
+                job_text = _truncate(job_text, self.budget - estimate_tokens(links_text))
+
+        baseline = estimate_tokens(str(job)) + estimate_tokens(str(links))
+        job_tokens = estimate_tokens(job_text)
+        link_tokens = estimate_tokens(links_text)
+        report = {
+            "job_tokens": job_tokens,
+            "link_tokens": link_tokens,
+            "total_tokens": job_tokens + link_tokens,
+            "baseline_tokens": baseline,
+            "tokens_saved": baseline - job_tokens - link_tokens,
+            "trimmed": trimmed,
+        }
+        return job_text, links_text or "None", report
@@ -0,0 +1,205 @@
+import os
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding up to one minute of budget"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        # A request larger than the whole bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                wait = (amount - self.available) / self.rate
+            time.sleep(wait)
+
+    def charge(self, amount):
+        """Debit (or refund, when negative) usage outside acquire, e.g. estimate corrections"""
+        with self._lock:
+            self._refill()
+            self.available = min(self.capacity, self.available - amount)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: grows while calls are fast, halves on errors or slow calls"""
+
+    def __init__(self, initial, minimum, maximum, target_latency):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, overloaded=False):
+        with self._cond:
+            self.in_flight -= 1
+            if overloaded or (latency is not None and latency > self.target_latency):
+                self.limit = max(self.minimum, self.limit / 2)
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class LLMScheduler:
+    """Gatekeeper in front of the Groq client.
+
+    Enforces requests-per-minute and tokens-per-minute budgets, retries 429 and 5xx
+    responses with jittered exponential backoff, and adapts concurrency to observed
+    latency and errors.
+    """
+
+    def __init__(self, rpm=None, tpm=None, max_retries=None):
+        self.requests = TokenBucket(rpm or int(os.getenv("GROQ_RPM", "30")))
+        self.tokens = TokenBucket(tpm or int(os.getenv("GROQ_TPM", "12000")))
+        self.limiter = AdaptiveLimiter(
+            initial=int(os.getenv("GROQ_INITIAL_CONCURRENCY", "4")),
+            minimum=1,
+            maximum=int(os.getenv("GROQ_MAX_CONCURRENCY", "16")),
+            target_latency=float(os.getenv("GROQ_TARGET_LATENCY", "15")))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GROQ_MAX_RETRIES", "5"))
+        self.base_delay = float(os.getenv("GROQ_BACKOFF_BASE", "1"))
+        self.max_delay = float(os.getenv("GROQ_BACKOFF_MAX", "60"))
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _classify(error):
+        """Return (retryable, retry_after seconds or None) for an exception from the client"""
+        status = getattr(error, "status_code", None)
+        response = getattr(error, "response", None)
+        retry_after = None
+        if response is not None and getattr(response, "headers", None):
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        if status == 429 or (status is not None and status >= 500):
+            return True, retry_after
+        # Dropped connections and timeouts carry no status code
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True, None
+        return False, None
+
+    def _backoff(self, attempt, retry_after):
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        # Full jitter keeps concurrent retries from arriving in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _admit(self, estimated_tokens):
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+        self.limiter.acquire()
+
+    def _failed(self, error, attempt):
+        """Release the slot for a failed attempt and either back off or re-raise"""
+        retryable, retry_after = self._classify(error)
+        self.limiter.release(overloaded=retryable)
+        if not retryable or attempt >= self.max_retries:
+            raise error
+        with self._stats_lock:
+            self.retries += 1
+            if getattr(error, "status_code", None) == 429:
+                self.throttled += 1
+        time.sleep(self._backoff(attempt, retry_after))
+
+    def _settle(self, estimated_tokens, used_tokens):
+        with self._stats_lock:
+            self.calls += 1
+        if used_tokens:
+            self.tokens.charge(used_tokens - estimated_tokens)
+
+    def call(self, fn, estimated_tokens):
+        """Run fn() under the rate limits, retrying transient failures"""
+        attempt = 0
+        while True:
+            self._admit(estimated_tokens)
+            started = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                self._failed(e, attempt)
+                attempt += 1
+                continue
+            self.limiter.release(latency=time.monotonic() - started)
+            usage = getattr(result, "usage_metadata", None) or {}
+            self._settle(estimated_tokens, usage.get("total_tokens"))
+            return result
+
+    def stream(self, fn, estimated_tokens):
+        """Iterate fn() under the rate limits.
+
+        Failures before the first chunk are retried; once chunks have been yielded the
+        error is raised to the caller. Latency is measured to the first chunk.
+        """
+        attempt = 0
+        while True:
+            self._admit(estimated_tokens)
+            started = time.monotonic()
+            first_chunk_latency = None
+            used_tokens = 0
+            try:
+                for chunk in fn():
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.monotonic() - started
+                    usage = getattr(chunk, "usage_metadata", None) or {}
+                    used_tokens += usage.get("total_tokens", 0)
+                    yield chunk
+            except GeneratorExit:
+                # The caller stopped reading; free the slot without judging the provider
+                self.limiter.release(latency=first_chunk_latency)
+                raise
+            except Exception as e:
+                if first_chunk_latency is not None:
+                    self.limiter.release(overloaded=self._classify(e)[0])
+                    raise
+                self._failed(e, attempt)
+                attempt += 1
+                continue
+            self.limiter.release(latency=first_chunk_latency)
+            self._settle(estimated_tokens, used_tokens)
+            return
+
+    def stats(self):
+        return {"calls": self.calls, "retries": self.retries, "throttled": self.throttled,
+                "concurrency_limit": round(self.limiter.limit, 2), "in_flight": self.limiter.in_flight}
+
+
+_scheduler_lock = threading.Lock()
+_scheduler = None
+
+
+def get_scheduler():
+    """Return the process-wide scheduler; Groq limits apply per API key, not per session"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
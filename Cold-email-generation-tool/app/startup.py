@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import threading
+import importlib
+from tracing import span
+
+# Modules that pull in langchain, chromadb, pandas, bs4 or aiohttp when first imported
+HEAVY_MODULES = ["chains", "portfolio", "page_cache"]
+
+# Taken when the app script first imports this module, i.e. at the start of the first run
+PROCESS_STARTED = time.perf_counter()
+
+_import_lock = threading.Lock()
+_import_times = {}
+_first_paint_ms = None
+_prewarm_thread = None
+
+
+def lazy_import(name):
+    """Import a module on first use and record how long the import took.
+
+    Once the module is loaded this is a dictionary lookup, so call sites can resolve
+    heavy dependencies at the point they are needed instead of at script start.
+    """
+    # Only trust sys.modules once the import has finished; while the prewarm thread is
+    # still running a module body, import_module blocks until it is complete
+    if name in _import_times:
+        return sys.modules[name]
+    with span("import", module=name):
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+    with _import_lock:
+        # The thread that actually ran the module body reports the real import time
+        if name not in _import_times or elapsed > _import_times[name]["ms"]:
+            _import_times[name] = {"ms": elapsed, "thread": threading.current_thread().name}
+    return module
+
+
+def _prewarm(names):
+    for name in names:
+        try:
+            lazy_import(name)
+        except Exception:
+            # The foreground import will raise the same error where it can be shown
+            pass
+
+
+def prewarm(names=None):
+    """Import heavy modules in a background thread, once per process.
+
+    Disabled with PREWARM_IMPORTS=0.
+    """
+    global _prewarm_thread
+    if os.getenv("PREWARM_IMPORTS", "1") == "0":
+        return
+    with _import_lock:
+        if _prewarm_thread is not None:
+            return
+        _prewarm_thread = threading.Thread(target=_prewarm, args=(names or HEAVY_MODULES,),
+                                           name="import-prewarm", daemon=True)
+    _prewarm_thread.start()
+
+
+def mark_first_paint():
+    """Record the time from process start to the end of the first script run"""
+    global _first_paint_ms
+    with _import_lock:
+        if _first_paint_ms is None:
+            _first_paint_ms = round((time.perf_counter() - PROCESS_STARTED) * 1000, 1)
+
+
+def import_profile():
+    with _import_lock:
+        return {"first_paint_ms": _first_paint_ms, "imports": dict(_import_times)}
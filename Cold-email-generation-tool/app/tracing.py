@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import contextmanager
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Timings for one generation request, collected as a flat list of spans.
+
+    Spans may be recorded from several threads; each carries its offset from the start
+    of the trace so the whole request can be drawn as a waterfall.
+    """
+
+    def __init__(self, name, **attrs):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration_ms = None
+        self.spans = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        started = time.perf_counter()
+        record = {"name": name, "start_ms": round((started - self._start) * 1000, 2),
+                  "thread": threading.current_thread().name, "attrs": attrs}
+        try:
+            yield attrs
+        except Exception as e:
+            attrs["error"] = str(e)
+            raise
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            with self._lock:
+                self.spans.append(record)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        return self
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        return {"trace_id": self.trace_id, "name": self.name, "started_at": self.started_at,
+                "duration_ms": self.duration_ms, "attrs": self.attrs, "spans": spans}
+
+    def export(self, path=None):
+        """Append the trace as one JSON line, rotating the file once it grows past TRACE_MAX_BYTES"""
+        path = path or os.getenv("TRACE_PATH", "cache/traces.jsonl")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps(self.to_dict(), default=str) + "\n"
+        with _export_lock:
+            _rotate(path, int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024))),
+                    int(os.getenv("TRACE_BACKUPS", "3")))
+            with open(path, "a") as f:
+                f.write(line)
+
+
+_export_lock = threading.Lock()
+
+
+def _rotate(path, max_bytes, backups):
+    """Shift path to path.1, path.1 to path.2 and so on once it reaches max_bytes.
+
+    At most backups old files are kept, so traces never use more than about
+    (backups + 1) * max_bytes of disk. Call with _export_lock held.
+    """
+    try:
+        if os.path.getsize(path) < max_bytes:
+            return
+    except OSError:
+        return
+    if backups <= 0:
+        os.remove(path)
+        return
+    for number in range(backups - 1, 0, -1):
+        if os.path.exists(f"{path}.{number}"):
+            os.replace(f"{path}.{number}", f"{path}.{number + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def begin_trace(name, **attrs):
+    """Start a trace and make it current until end_trace is called"""
+    trace = Trace(name, **attrs)
+    trace._token = _current_trace.set(trace)
+    return trace
+
+
+def end_trace(trace):
+    """Detach, finish and export a trace started with begin_trace"""
+    _current_trace.reset(trace._token)
+    trace.finish()
+    trace.export()
+    return trace
+
+
+@contextmanager
+def start_trace(name, **attrs):
+    """Make a new trace current for the enclosed block, then finish and export it"""
+    trace = begin_trace(name, **attrs)
+    try:
+        yield trace
+    finally:
+        end_trace(trace)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, trace=None, **attrs):
+    """Record a span on the given or current trace; a no-op outside of any trace.
+
+    Yields a dict the caller can add output attributes to.
+    """
+    trace = trace or _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, **attrs) as span_attrs:
+        yield span_attrs
+
+
+def submit(executor, fn, *args):
+    """executor.submit that carries the current trace into the worker thread"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
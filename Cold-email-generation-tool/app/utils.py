@@ -1,16 +1,58 @@
 import re
+import string
+
+# Compiled once at import; clean_text runs over multi-megabyte careers pages
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+# Same matches as the original URL pattern, with its character class folded to [!$-_a-z]
+_URL_PATTERN = re.compile(r'https?://[!$-_a-z]+')
+# ASCII characters other than letters, digits and spaces
+_SPECIAL_ASCII = bytes(c for c in range(128) if chr(c) not in string.ascii_letters + string.digits + ' ')
+
 
 def clean_text(text):
-    # Remove HTML tags
-    text = re.sub(r'<[^>]*?>', '', text)
+    # Remove HTML tags first: stripping a tag can join the pieces of a URL
+    text = _TAG_PATTERN.sub('', text)
     # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    # Remove special characters
-    text = re.sub(r'[^a-zA-Z0-9 ]', '', text)
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s{2,}', ' ', text)
-    # Trim leading and trailing whitespace
-    text = text.strip()
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    return text
\ No newline at end of file
+    text = _URL_PATTERN.sub('', text)
+    # Remove special characters: non-ASCII ones are dropped while encoding,
+    # the rest through a byte translation table
+    text = text.encode('ascii', 'ignore').translate(None, _SPECIAL_ASCII).decode('ascii')
+    # Collapse runs of spaces and trim the ends
+    return ' '.join(text.split())
+
+def estimate_tokens(text):
+    # Llama-style tokenizers average roughly four characters per token on English text
+    return (len(text) + 3) // 4
+
+
+def split_into_chunks(text, max_tokens, overlap_tokens=0):
+    """Split text on word boundaries into chunks of at most max_tokens estimated tokens.
+
+    Consecutive chunks share about overlap_tokens of text so a posting that straddles
+    a boundary appears whole in at least one chunk.
+    """
+    max_chars = max_tokens * 4
+    overlap_chars = overlap_tokens * 4
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end < len(text):
+            split_at = text.rfind(' ', start, end)
+            if split_at > start:
+                end = split_at
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        # Step back by the overlap, then forward to the next word boundary
+        next_start = end - overlap_chars
+        if next_start <= start:
+            next_start = end
+        else:
+            space = text.find(' ', next_start, end)
+            next_start = space + 1 if space != -1 else end
+        start = next_start
+    return [chunk for chunk in chunks if chunk]
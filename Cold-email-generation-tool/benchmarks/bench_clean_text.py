@@ -0,0 +1,102 @@
+"""clean_text micro-benchmark over synthetic 1-10 MB careers pages.
+
+Checks that clean_text matches the original six-pass implementation byte for byte
+and exits non-zero if the speedup falls below --min-speedup.
+
+Usage (from the Cold-email-generation-tool directory):
+    python benchmarks/bench_clean_text.py --sizes 1 5 10
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils import clean_text  # noqa: E402
+
+ROLES = ["Senior Software Engineer", "Data Scientist", "Product Manager", "DevOps Engineer",
+         "Frontend Developer", "Machine Learning Engineer", "QA Analyst", "Solutions Architect"]
+SKILLS = ["Python", "Java", "React", "AWS", "Kubernetes", "SQL", "TypeScript", "Spark", "Go", "C#/.NET"]
+CITIES = ["Beaverton, OR", "Austin, TX", "London, UK", "Bengaluru, IN", "Remote (US)"]
+
+
+def legacy_clean_text(text):
+    """The original implementation, kept as the reference for output and timing"""
+    text = re.sub(r'<[^>]*?>', '', text)
+    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
+    text = re.sub(r'[^a-zA-Z0-9 ]', '', text)
+    text = re.sub(r'\s{2,}', ' ', text)
+    text = text.strip()
+    text = ' '.join(text.split())
+    return text
+
+
+def job_card(rng, idx):
+    role = rng.choice(ROLES)
+    skills = "".join(f"<li>{skill}</li>" for skill in rng.sample(SKILLS, 4))
+    return (
+        f'<div class="job-card" data-id="R-{idx:05d}">\n'
+        f'  <a href="https://jobs.example.com/job/R-{idx:05d}?src=careers&amp;utm_source=web">'
+        f'<h2 class="title">{role}</h2></a>\n'
+        f'  <span class="location">{rng.choice(CITIES)}</span>&nbsp;|&nbsp;'
+        f'<span class="exp">{rng.randint(1, 12)}+ years</span>\n'
+        f'  <p>We&#39;re hiring a {role.lower()} to build products used by millions — '
+        f'apply at https://careers.example.com/apply?id={idx} or email jobs@example.com.</p>\n'
+        f'  <ul class="skills">{skills}</ul>\n'
+        f'  <script>window.dataLayer.push({{"event": "view", "job": {idx}}});</script>\n'
+        f'</div>\n'
+    )
+
+
+def make_page(size_mb, seed=0):
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    parts = ['<html><head><title>Careers</title><style>.job-card { margin: 0 }</style></head><body>\n']
+    length = len(parts[0])
+    idx = 0
+    while length < target:
+        card = job_card(rng, idx)
+        parts.append(card)
+        length += len(card)
+        idx += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10], help="fixture sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-speedup", type=float, default=1.5)
+    args = parser.parse_args()
+
+    failed = False
+    for size_mb in args.sizes:
+        page = make_page(size_mb)
+        legacy_time, expected = best_of(legacy_clean_text, page, args.repeat)
+        new_time, actual = best_of(clean_text, page, args.repeat)
+        if actual != expected:
+            print(f"{size_mb:>3} MB  OUTPUT MISMATCH")
+            failed = True
+            continue
+        speedup = legacy_time / new_time
+        print(f"{size_mb:>3} MB  legacy {legacy_time * 1000:8.1f} ms  clean_text {new_time * 1000:8.1f} ms  "
+              f"{size_mb / new_time:6.1f} MB/s  x{speedup:.2f}")
+        failed = failed or speedup < args.min_speedup
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
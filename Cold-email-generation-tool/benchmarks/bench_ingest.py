@@ -0,0 +1,79 @@
+"""Portfolio ingestion throughput benchmark.
+
+Usage (from the Cold-email-generation-tool directory):
+    python benchmarks/bench_ingest.py --rows 20000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from portfolio import Portfolio  # noqa: E402
+
+TECHNOLOGIES = [
+    "Python", "Django", "Flask", "FastAPI", "React", "Angular", "Vue.js", "Node.js", "Express",
+    "MongoDB", "PostgreSQL", "MySQL", "Redis", "Kafka", "AWS", "Azure", "GCP", "Docker",
+    "Kubernetes", "Terraform", "Java", "Spring Boot", "Kotlin", "Swift", "Flutter", "Go",
+    "Rust", "TypeScript", ".NET", "SQL Server", "TensorFlow", "PyTorch", "Spark", "Airflow",
+]
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [[", ".join(rng.sample(TECHNOLOGIES, rng.randint(2, 5))), f"https://example.com/portfolio-{i}"]
+            for i in range(count)]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Techstack", "Links"])
+        writer.writerows(rows)
+
+
+def timed_ingest(csv_path, store_path, batch_size):
+    started = time.perf_counter()
+    portfolio = Portfolio(csv_path, store_path, batch_size=batch_size)
+    portfolio.load_portfolio()
+    return time.perf_counter() - started, portfolio.last_ingest
+
+
+def report(label, rows, elapsed, stats):
+    print(f"{label:<22} {elapsed:8.2f}s  {rows / elapsed:10.0f} rows/s  {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--edit-ratio", type=float, default=0.01,
+                        help="fraction of rows changed before the incremental re-ingest")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "portfolio.csv")
+        store_path = os.path.join(workdir, "vectorstore")
+        rows = make_rows(args.rows)
+        write_csv(csv_path, rows)
+
+        elapsed, stats = timed_ingest(csv_path, store_path, args.batch_size)
+        report("cold ingest", args.rows, elapsed, stats)
+
+        elapsed, stats = timed_ingest(csv_path, store_path, args.batch_size)
+        report("re-ingest (no change)", args.rows, elapsed, stats)
+
+        edited = max(1, int(args.rows * args.edit_ratio))
+        for i in range(edited):
+            rows[i][1] = f"https://example.com/edited-{i}"
+        write_csv(csv_path, rows)
+        elapsed, stats = timed_ingest(csv_path, store_path, args.batch_size)
+        report("incremental re-ingest", args.rows, elapsed, stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Offline end-to-end pipeline benchmark over saved careers pages.
+
+Runs the real clean, extract, match and write stages against the HTML fixtures,
+with a deterministic fake LLM in place of ChatGroq and hashed embeddings in place
+of the MiniLM model, so it needs no network. Reports per-stage and end-to-end
+latency percentiles and throughput. Every cache lives in a temporary directory and
+the rate-limit budget is separate from the app's, so results are repeatable and
+nothing leaks into the app's caches.
+
+Usage (from the Cold-email-generation-tool directory):
+    python benchmarks/bench_pipeline.py --iterations 5 --latency 0.5 --tokens-per-second 250
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from chains import Chain  # noqa: E402
+from fake_embeddings import HashingEmbeddingFunction  # noqa: E402
+from fake_llm import FakeChatGroq  # noqa: E402
+from page_cache import _extract_text  # noqa: E402
+from portfolio import Portfolio  # noqa: E402
+from scheduler import LLMScheduler  # noqa: E402
+from utils import clean_text  # noqa: E402
+
+STAGES = ["clean", "extract", "match", "write", "end_to_end"]
+SENDER = {
+    "sender_name": "Alex Morgan", "sender_title": "Business Development Executive",
+    "company_name": "Benchmark Consulting", "company_type": "AI & Software Consulting",
+    "company_description": "We build and run software for growing companies.",
+    "company_achievements": "Delivered over a hundred projects on time and on budget.",
+    "email_tone": "professional", "signature_style": "standard",
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def run_page(html, chain, portfolio):
+    """Process one page and return (seconds per stage, number of jobs)"""
+    timings = {}
+    started = time.perf_counter()
+    _, text = _extract_text(html, clean_text)
+    timings["clean"] = time.perf_counter() - started
+
+    stage_started = time.perf_counter()
+    jobs = chain.extract_jobs(text, use_cache=False)
+    timings["extract"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    job_links = portfolio.query_links_batch([job.get("skills", []) for job in jobs])
+    timings["match"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    keys = range(len(jobs))
+    for _, _, error in chain.write_mails({idx: (jobs[idx], job_links[idx]) for idx in keys}, refresh=keys):
+        if error is not None:
+            raise error
+    timings["write"] = time.perf_counter() - stage_started
+
+    timings["end_to_end"] = time.perf_counter() - started
+    return timings, len(jobs)
+
+
+def summarize(samples, pages, jobs, wall):
+    summary = {}
+    for stage in STAGES:
+        values = samples[stage]
+        summary[stage] = {
+            "p50_ms": percentile(values, 50) * 1000,
+            "p90_ms": percentile(values, 90) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "pages_per_s": len(values) / sum(values) if sum(values) else float("inf"),
+        }
+    summary["total"] = {"pages": pages, "jobs": jobs, "wall_s": wall,
+                        "pages_per_s": pages / wall, "jobs_per_s": jobs / wall}
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'stage':<12} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'mean ms':>10} {'pages/s':>10}")
+    for stage in STAGES:
+        row = summary[stage]
+        print(f"{stage:<12} {row['p50_ms']:10.1f} {row['p90_ms']:10.1f} {row['p99_ms']:10.1f} "
+              f"{row['mean_ms']:10.1f} {row['pages_per_s']:10.2f}")
+    total = summary["total"]
+    print(f"\n{total['pages']} pages, {total['jobs']} jobs in {total['wall_s']:.2f}s: "
+          f"{total['pages_per_s']:.2f} pages/s, {total['jobs_per_s']:.2f} jobs/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=os.path.join(BENCH_DIR, "fixtures"), help="directory of .html pages")
+    parser.add_argument("--portfolio", default="app/resource/my_portfolio.csv")
+    parser.add_argument("--iterations", type=int, default=3, help="passes over the fixture set")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=250.0, help="fake LLM output token rate")
+    parser.add_argument("--email-tokens", type=int, default=180, help="length of each fake email")
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="embed with Chroma's default MiniLM model (downloaded on first use)")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not fixtures:
+        parser.error(f"no .html fixtures in {args.fixtures}")
+    pages = []
+    for path in fixtures:
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(f.read())
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The shared caches read their paths when first created, so point them here before any is
+        for name, filename in [("LLM_CACHE_PATH", "llm_cache.sqlite3"), ("DEDUP_PATH", "fingerprints.sqlite3"),
+                               ("EMBEDDING_CACHE_PATH", "embeddings.sqlite3"), ("TRACE_PATH", "traces.jsonl")]:
+            os.environ[name] = os.path.join(workdir, filename)
+        chain = Chain(dict(SENDER))
+        chain.llm = FakeChatGroq(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                 email_tokens=args.email_tokens)
+        # Keep fake completions off the real Groq budget
+        chain.scheduler = LLMScheduler(rpm=10 ** 6, tpm=10 ** 9, max_retries=0)
+        embedding_function = None if args.real_embeddings else HashingEmbeddingFunction()
+        portfolio = Portfolio(args.portfolio, os.path.join(workdir, "vectorstore"),
+                              embedding_function=embedding_function)
+        portfolio.load_portfolio()
+
+        samples = {stage: [] for stage in STAGES}
+        jobs = 0
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            for html in pages:
+                timings, count = run_page(html, chain, portfolio)
+                jobs += count
+                for stage in STAGES:
+                    samples[stage].append(timings[stage])
+        wall = time.perf_counter() - started
+
+    summary = summarize(samples, len(samples["end_to_end"]), jobs, wall)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cold-start import profile for the Streamlit app.
+
+Imports the modules main.py loads at script start, and each module it defers, in a
+fresh interpreter with -X importtime, and reports wall time plus the slowest
+top-level packages so import regressions show up between runs.
+
+Usage (from the Cold-email-generation-tool directory):
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+
+
+def main_imports():
+    """Modules main.py imports at module level, read from its source so the list never goes stale"""
+    with open(os.path.join(APP_DIR, "main.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def deferred_imports():
+    """The modules startup.lazy_import defers to first use"""
+    with open(os.path.join(APP_DIR, "startup.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "HEAVY_MODULES"
+                                                for target in node.targets):
+            return ast.literal_eval(node.value)
+    return []
+
+
+# What main.py imports before the first paint, and what it defers to first use
+STARTUP = ", ".join(main_imports())
+DEFERRED = deferred_imports()
+
+
+def profile_import(modules, runs):
+    """Return (median wall ms, {package: cumulative ms}) for importing modules"""
+    walls = []
+    packages = {}
+    for _ in range(runs):
+        code = (f"import time; started = time.perf_counter(); import {modules}; "
+                f"print((time.perf_counter() - started) * 1000)")
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=APP_DIR,
+                                capture_output=True, text=True, check=True)
+        walls.append(float(result.stdout.strip().splitlines()[-1]))
+        packages = {}
+        for line in result.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            # Attribute each package's largest cumulative time, wherever it was first imported
+            package = name.strip().split(".")[0]
+            if package in modules.split(", ") or not cumulative.strip().isdigit():
+                continue
+            packages[package] = max(packages.get(package, 0), int(cumulative) / 1000)
+    return statistics.median(walls), packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=5, help="slowest packages listed per module")
+    args = parser.parse_args()
+
+    for label, modules in [("startup", STARTUP)] + [(name, name) for name in DEFERRED]:
+        wall, packages = profile_import(modules, args.runs)
+        slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"{label:<12} {wall:8.0f} ms  " + ", ".join(f"{name} {ms:.0f}" for name, ms in slowest))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Deterministic offline stand-in for Chroma's default embedding function.
+
+The default function downloads the ONNX MiniLM model on first use. The benchmarks
+use hashed bag-of-words vectors instead: no network, no model files, and the same
+texts always embed to the same vectors.
+"""
+import hashlib
+import re
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """L2-normalized counts of each word's hash bucket"""
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = np.zeros(self.dimensions, dtype=np.float32)
+            for word in _WORD.findall(str(text).lower()):
+                vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimensions] += 1
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors
+
+    @staticmethod
+    def name():
+        return "hashing_benchmark"
+
+    def get_config(self):
+        return {"dimensions": self.dimensions}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashingEmbeddingFunction(config.get("dimensions", 384))
@@ -0,0 +1,106 @@
+"""Deterministic offline stand-in for ChatGroq used by the benchmarks.
+
+Extraction prompts are answered with the job postings found in the scraped text
+(known role titles and skills), email prompts with a fixed-length email. Latency to
+the first token and the output token rate are configurable, so runs model a real
+provider without network access or an API key.
+"""
+import hashlib
+import json
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ROLES = [
+    "Senior Software Engineer", "Software Engineer", "Data Scientist", "Data Engineer",
+    "Product Manager", "DevOps Engineer", "Frontend Developer", "Backend Developer",
+    "Machine Learning Engineer", "QA Analyst", "Solutions Architect", "Mobile Developer",
+]
+SKILLS = [
+    "Python", "Java", "React", "Angular", "AWS", "Azure", "GCP", "Kubernetes",
+    "Docker", "SQL", "TypeScript", "Spark", "Kafka", "Flutter", "Swift", "Django",
+    "TensorFlow", "PyTorch", "MongoDB", "PostgreSQL", "Terraform",
+]
+WORDS = ("we help teams like yours ship reliable software faster with a dedicated group of "
+         "engineers who have delivered similar projects for clients across many industries").split()
+
+_ROLE_PATTERN = re.compile("|".join(re.escape(role) for role in ROLES))
+_EXPERIENCE_PATTERN = re.compile(r"(\d+)\s*years")
+
+
+def _tokens(text):
+    return (len(text) + 3) // 4
+
+
+class FakeChatGroq(BaseChatModel):
+    """Chat model with a fixed first-token latency and output token rate"""
+
+    model_name: str = "fake-llama"
+    temperature: float = 0
+    latency: float = 0.5
+    tokens_per_second: float = 250.0
+    email_tokens: int = 180
+    chunk_tokens: int = 8
+
+    @property
+    def _llm_type(self):
+        return "fake-chat-groq"
+
+    def _respond(self, prompt):
+        if "SCRAPED TEXT FROM WEBSITE" in prompt:
+            page = prompt.split("### INSTRUCTION")[0]
+            return json.dumps(self._extract(page), separators=(",", ": "))
+        return self._email(prompt)
+
+    @staticmethod
+    def _extract(page):
+        """One job per role title, with the skills and experience that follow it.
+
+        clean_text drops newlines and punctuation, so skills are matched as substrings.
+        """
+        matches = list(_ROLE_PATTERN.finditer(page))
+        jobs = []
+        for idx, match in enumerate(matches):
+            end = matches[idx + 1].start() if idx + 1 < len(matches) else len(page)
+            section = page[match.end():end]
+            experience = _EXPERIENCE_PATTERN.search(section)
+            jobs.append({
+                "role": match.group(0),
+                "experience": f"{experience.group(1)}+ years" if experience else "",
+                "skills": [skill for skill in SKILLS if skill in section],
+                "description": " ".join(section.split()[:40]),
+            })
+        return jobs
+
+    def _email(self, prompt):
+        seed = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        words = []
+        while _tokens(" ".join(words)) < self.email_tokens:
+            words.append(WORDS[(seed + len(words)) % len(WORDS)])
+        return "Subject: Helping your team\n\nDear Hiring Manager,\n\n" + " ".join(words) + "\n\nBest regards"
+
+    def _usage(self, prompt, output):
+        input_tokens, output_tokens = _tokens(prompt), _tokens(output)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(message.content) for message in messages)
+        output = self._respond(prompt)
+        time.sleep(self.latency + _tokens(output) / self.tokens_per_second)
+        message = AIMessage(content=output, usage_metadata=self._usage(prompt, output))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = "\n".join(str(message.content) for message in messages)
+        output = self._respond(prompt)
+        time.sleep(self.latency)
+        step = self.chunk_tokens * 4
+        for start in range(0, len(output), step):
+            text = output[start:start + step]
+            time.sleep(_tokens(text) / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(prompt, output)))